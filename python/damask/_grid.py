@@ -1,20 +1,33 @@
 import copy
-import multiprocessing as mp
-from functools import partial
 import os
+import tempfile
+import base64
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import warnings
 
 import numpy as np
 import pandas as pd
 import h5py
-from scipy import ndimage, spatial
-from vtk.util.numpy_support import vtk_to_numpy as vtk_to_np
+from scipy import ndimage, spatial, sparse, fft
+from scipy.sparse import csgraph
 
 from . import VTK
+from . import Table
 from . import util
 from . import grid_filters
 from . import Rotation
 
+_vtk_types = {'Int8':'i1', 'Int16':'i2', 'Int32':'i4', 'Int64':'i8',
+              'UInt8':'u1','UInt16':'u2','UInt32':'u4','UInt64':'u8',
+              'Float32':'f4','Float64':'f8','String':'u1'}
+
+
+class _UnsupportedLayout(Exception):
+    """VTK XML file layout not supported by the native reader."""
+
 
 class Grid:
     """Geometry definition for grid solvers."""
@@ -105,8 +118,11 @@ class Grid:
     def material(self,material):
         if len(material.shape) != 3:
             raise ValueError(f'invalid material shape {material.shape}')
-        elif material.dtype not in np.sctypes['float'] + np.sctypes['int']:
+        elif material.dtype not in np.sctypes['float'] + np.sctypes['int'] + np.sctypes['uint']:
             raise TypeError(f'invalid material data type {material.dtype}')
+        self._pyramid = {}
+        if isinstance(material,np.memmap):
+            self._material = material                                                               # out-of-core: no copy
         else:
             self._material = np.copy(material)
 
@@ -173,21 +189,119 @@ class Grid:
             if not given.
 
         """
-        v = VTK.load(fname if str(fname).endswith('.vtr') else str(fname)+'.vtr')
-        comments = v.get_comments()
-        cells = np.array(v.vtk_data.GetDimensions())-1
-        bbox  = np.array(v.vtk_data.GetBounds()).reshape(3,2).T
-
-        for i,c in enumerate([v.vtk_data.GetXCoordinates(),v.vtk_data.GetYCoordinates(),v.vtk_data.GetZCoordinates()]):
-            if not np.allclose(vtk_to_np(c),np.linspace(bbox[0][i],bbox[1][i],cells[i]+1)):
+        fname_ = fname if str(fname).endswith('.vtr') else str(fname)+'.vtr'
+        try:
+            material,coordinates,comments = Grid._read_vtr(fname_)
+        except _UnsupportedLayout:                                                                  # fall back to VTK for other layouts
+            from vtk.util.numpy_support import vtk_to_numpy as vtk_to_np
+            v = VTK.load(fname_)
+            comments = v.get_comments()
+            coordinates = [vtk_to_np(c) for c in [v.vtk_data.GetXCoordinates(),
+                                                   v.vtk_data.GetYCoordinates(),
+                                                   v.vtk_data.GetZCoordinates()]]
+            material = v.get('material')
+
+        cells = np.array([len(c)-1 for c in coordinates])
+        bbox  = np.array([[c[0],c[-1]] for c in coordinates]).T
+
+        for i,c in enumerate(coordinates):
+            if not np.allclose(c,np.linspace(bbox[0][i],bbox[1][i],cells[i]+1)):
                 raise ValueError('regular grid spacing violated')
 
-        return Grid(material = v.get('material').reshape(cells,order='F'),
+        return Grid(material = material.reshape(cells,order='F'),
                     size = bbox[1] - bbox[0],
                     origin = bbox[0],
                     comments=comments)
 
 
+    @staticmethod
+    def _read_vtr(fname):
+        """
+        Read VTK XML rectilinear grid file without VTK.
+
+        Supports inline binary and raw appended data, uncompressed or zlib-compressed.
+
+        Parameters
+        ----------
+        fname : str or pathlib.Path
+            File to read.
+
+        Returns
+        -------
+        material : numpy.ndarray of shape (:)
+            Cell data 'material' in Fortran order.
+        coordinates : list of three numpy.ndarray of shape (:)
+            Cell corner coordinates along x, y, and z.
+        comments : list of str
+            Comments.
+
+        Raises
+        ------
+        _UnsupportedLayout
+            If the file layout is not supported by the native reader.
+
+        """
+        with open(fname,'rb') as f:
+            content = f.read()
+        buffer = memoryview(content)
+
+        appended = content.find(b'<AppendedData')
+        try:
+            root = ET.fromstring(content if appended < 0 else content[:appended]+b'</VTKFile>')
+        except ET.ParseError:
+            raise _UnsupportedLayout
+        if root.get('type') != 'RectilinearGrid' or root.get('compressor') not in [None,'vtkZLibDataCompressor']:
+            raise _UnsupportedLayout
+        byte_order = '<' if root.get('byte_order','LittleEndian') == 'LittleEndian' else '>'
+        header_t = np.dtype(byte_order+('u8' if root.get('header_type') == 'UInt64' else 'u4'))
+        compressed = root.get('compressor') is not None
+        if appended >= 0:
+            if b'encoding="raw"' not in content[appended:content.index(b'>',appended)]:
+                raise _UnsupportedLayout
+            appended = content.index(b'_',appended) + 1
+
+        def decode(array):
+            """Decode (compressed) binary data of a (Data)Array element."""
+            if array.get('type') not in _vtk_types or array.get('format') not in ['binary','appended']:
+                raise _UnsupportedLayout
+            if array.get('format') == 'appended':
+                data = buffer[appended+int(array.get('offset')):]
+                header = np.frombuffer(data[:header_t.itemsize*(3 if compressed else 1)],header_t)
+                if compressed: header = np.frombuffer(data[:header_t.itemsize*(3+int(header[0]))],header_t)
+                data = data[header.nbytes:]
+            else:
+                text = ''.join(array.text.split()).encode()
+                if compressed:                                                                      # header and data encoded separately
+                    N_blocks = int(np.frombuffer(base64.b64decode(text[:4*header_t.itemsize]),header_t)[0])
+                    length = 4*int(np.ceil((3+N_blocks)*header_t.itemsize/3))
+                    header = np.frombuffer(base64.b64decode(text[:length]),header_t)[:3+N_blocks]
+                    data = memoryview(base64.b64decode(text[length:]))
+                else:
+                    data = memoryview(base64.b64decode(text))
+                    header = np.frombuffer(data[:header_t.itemsize],header_t)
+                    data = data[header_t.itemsize:]
+
+            if compressed:
+                block_sizes = header[3:].astype(int)
+                data = b''.join([zlib.decompress(data[e-s:e]) for s,e in zip(block_sizes,np.cumsum(block_sizes))])
+            else:
+                data = bytes(data[:int(header[0])])
+
+            if array.get('type') == 'String':
+                return [c.decode() for c in data.split(b'\0')[:-1]]
+            else:
+                return np.frombuffer(data,byte_order+_vtk_types[array.get('type')])
+
+        material = root.find("./RectilinearGrid/Piece/CellData/DataArray[@Name='material']")
+        if material is None:
+            raise ValueError('Array "material" not found.')
+        comments = root.find("./RectilinearGrid/FieldData/Array[@Name='comments']")
+
+        return (decode(material),
+                [decode(c) for c in root.findall('./RectilinearGrid/Piece/Coordinates/DataArray')],
+                [] if comments is None else decode(comments))
+
+
     @staticmethod
     def load_ASCII(fname):
         """
@@ -256,7 +370,8 @@ class Grid:
 
 
     @staticmethod
-    def load_DREAM3D(fname,base_group,point_data=None,material='FeatureIds'):
+    def load_DREAM3D(fname,base_group,point_data=None,material='FeatureIds',
+                     feature_data=None,phase='Phases',quaternion='AvgQuats'):
         """
         Load from DREAM.3D file.
 
@@ -273,20 +388,61 @@ class Grid:
         material : str, optional
             Name of the dataset containing the material ID.
             Defaults to 'FeatureIds'.
+        feature_data : str, optional
+            Name of the group (folder) containing the feature data,
+            for example 'CellFeatureData'. Defaults to None, in which
+            case no feature data is read.
+        phase : str, optional
+            Name of the dataset containing the phase ID of each feature.
+            Defaults to 'Phases'.
+        quaternion : str, optional
+            Name of the dataset containing the average orientation of
+            each feature as quaternion in DREAM.3D convention, i.e.
+            (x,y,z,w) order and P = +1. Defaults to 'AvgQuats'.
+
+        Returns
+        -------
+        loaded : damask.Grid or tuple of (damask.Grid, dict)
+            If feature_data is None, only the grid-based geometry from file.
+            Otherwise, a tuple of the geometry and a dictionary with the
+            phase ID ('phase') and the orientation as quaternion in DAMASK
+            convention ('O'), i.e. (w,x,y,z) order and P = -1, of each feature.
+            The dictionary is suitable for ConfigMaterial.material_add; entry i
+            corresponds to material ID i, i.e. entry 0 is the (unused) DREAM.3D
+            dummy feature.
 
         """
-        root_dir ='DataContainers'
-        f = h5py.File(fname, 'r')
-        g = os.path.join(root_dir,base_group,'_SIMPL_GEOMETRY')
-        cells  = f[os.path.join(g,'DIMENSIONS')][()]
-        size   = f[os.path.join(g,'SPACING')][()] * cells
-        origin = f[os.path.join(g,'ORIGIN')][()]
+        root_dir = 'DataContainers'
+        with h5py.File(fname,'r') as f:
+            g = os.path.join(root_dir,base_group,'_SIMPL_GEOMETRY')
+            cells  = f[os.path.join(g,'DIMENSIONS')][()]
+            size   = f[os.path.join(g,'SPACING')][()] * cells
+            origin = f[os.path.join(g,'ORIGIN')][()]
+
+            if point_data is None:
+                ma = np.arange(cells.prod(),dtype=int).reshape(cells[::-1])
+            else:
+                dataset = f[os.path.join(root_dir,base_group,point_data,material)]
+                ma = np.empty(cells[::-1],dtype=dataset.dtype)                                      # z slow, x fast
+                N_plane = int(np.prod(cells[:2]))
+                N_slab  = max(1,2**22//N_plane)
+                layered = dataset.shape[:3] == tuple(cells[::-1])                                   # (z,y,x[,1]) or flat
+                for z in range(0,cells[2],N_slab):                                                  # hyperslabs along z
+                    ma[z:z+N_slab] = (dataset[z:z+N_slab] if layered else
+                                      dataset[z*N_plane:(z+N_slab)*N_plane]).reshape((-1,)+tuple(cells[1::-1]))
+
+            if feature_data is not None:
+                q = f[os.path.join(root_dir,base_group,feature_data,quaternion)][()].reshape(-1,4)
+                q = np.where(np.isclose(np.linalg.norm(q,axis=-1,keepdims=True),0.),[0.,0.,0.,1.],q)  # dummy feature
+                q = np.block([q[...,3:4],-q[...,:3]])                                               # DREAM.3D: P = +1, DAMASK: P = -1
+                constituents = {'phase': f[os.path.join(root_dir,base_group,feature_data,phase)][()].reshape(-1),
+                                'O':     Rotation.from_quaternion(q,accept_homomorph=True).as_quaternion()}
 
-        ma = np.arange(cells.prod(),dtype=int) \
-             if point_data is None else \
-             np.reshape(f[os.path.join(root_dir,base_group,point_data,material)],cells.prod())
+        loaded = Grid(ma.T,size,origin,util.execution_stamp('Grid','load_DREAM3D'))
+        if feature_data is None:
+            return loaded
 
-        return Grid(ma.reshape(cells,order='F'),size,origin,util.execution_stamp('Grid','load_DREAM3D'))
+        return loaded,constituents
 
 
     @staticmethod
@@ -309,18 +465,14 @@ class Grid:
         cells,size,origin = grid_filters.cellsSizeOrigin_coordinates0_point(table.get(coordinates))
 
         labels_ = [labels] if isinstance(labels,str) else labels
-        unique,unique_inverse = np.unique(np.hstack([table.get(l) for l in labels_]),return_inverse=True,axis=0)
-
-        ma = np.arange(cells.prod()) if len(unique) == cells.prod() else \
-             np.arange(unique.size)[np.argsort(pd.unique(unique_inverse))][unique_inverse]
+        ma = np.zeros(cells.prod(),dtype=np.int64)
+        for column in np.hstack([table.get(l) for l in labels_]).T:                                 # numbered by first occurrence
+            codes,uniques = pd.factorize(column)
+            ma = pd.factorize(ma*(len(uniques)+1)+codes+1)[0]                                       # code -1: NaN
 
         return Grid(ma.reshape(cells,order='F'),size,origin,util.execution_stamp('Grid','from_table'))
 
 
-    @staticmethod
-    def _find_closest_seed(seeds, weights, point):
-        return np.argmin(np.sum((np.broadcast_to(point,(len(seeds),3))-seeds)**2,axis=1) - weights)
-
     @staticmethod
     def from_Laguerre_tessellation(cells,size,seeds,weights,material=None,periodic=True):
         """
@@ -342,29 +494,29 @@ class Grid:
         periodic : Boolean, optional
             Assume grid to be periodic. Defaults to True.
 
-        """
-        if periodic:
-            weights_p = np.tile(weights,27)                                                         # Laguerre weights (1,2,3,1,2,3,...,1,2,3)
-            seeds_p = np.vstack((seeds  -np.array([size[0],0.,0.]),seeds,  seeds  +np.array([size[0],0.,0.])))
-            seeds_p = np.vstack((seeds_p-np.array([0.,size[1],0.]),seeds_p,seeds_p+np.array([0.,size[1],0.])))
-            seeds_p = np.vstack((seeds_p-np.array([0.,0.,size[2]]),seeds_p,seeds_p+np.array([0.,0.,size[2]])))
-            coords  = grid_filters.coordinates0_point(cells*3,size*3,-size).reshape(-1,3)
-        else:
-            weights_p = weights
-            seeds_p   = seeds
-            coords    = grid_filters.coordinates0_point(cells,size).reshape(-1,3)
-
-        pool = mp.Pool(int(os.environ.get('OMP_NUM_THREADS',1)))
-        result = pool.map_async(partial(Grid._find_closest_seed,seeds_p,weights_p), [coord for coord in coords])
-        pool.close()
-        pool.join()
-        material_ = np.array(result.get())
+        Notes
+        -----
+        The power distance |x-s|² - w is expressed as Euclidean distance in a
+        four-dimensional space by lifting the seeds to (s,√(max(w)-w)) and the
+        cell centers to (x,0). A nearest-neighbor search of the lifted points
+        then gives the Laguerre cells.
 
-        if periodic:
-            material_ = material_.reshape(cells*3)
-            material_ = material_[cells[0]:cells[0]*2,cells[1]:cells[1]*2,cells[2]:cells[2]*2]%seeds.shape[0]
+        """
+        weights_ = np.asarray(weights,dtype=float)
+        if np.any(weights_ == np.inf):                                                              # first seed with w=+inf wins all
+            material_ = np.full(cells,np.argmax(weights_ == np.inf))
         else:
-            material_ = material_.reshape(cells)
+            active   = np.flatnonzero(weights_ > -np.inf)                                           # seeds with w=-inf never win
+            seeds_   = np.asarray(seeds)[active]%np.asarray(size) if periodic else \
+                       np.asarray(seeds)[active]
+            seeds_l  = np.hstack((seeds_,np.sqrt(weights_[active].max()-weights_[active]).reshape(-1,1)))
+            coords_l = np.zeros((np.prod(cells),4))
+            coords_l[:,:3] = grid_filters.coordinates0_point(cells,size).reshape(-1,3)
+
+            KDTree = spatial.cKDTree(seeds_l,boxsize=np.append(size,0.)) if periodic else \
+                     spatial.cKDTree(seeds_l)                                                       # boxsize 0: non-periodic lifting
+            devNull,material_ = KDTree.query(coords_l)
+            material_ = active[material_].reshape(cells)
 
         return Grid(material = material_ if material is None else material[material_],
                     size     = size,
@@ -373,10 +525,13 @@ class Grid:
 
 
     @staticmethod
-    def from_Voronoi_tessellation(cells,size,seeds,material=None,periodic=True):
+    def from_Voronoi_tessellation(cells,size,seeds,material=None,periodic=True,fname=None,return_distance=False):
         """
         Generate grid from Voronoi tessellation.
 
+        The cells are assigned in slabs along x, the nearest-neighbor
+        search uses OMP_NUM_THREADS threads or, if not set, all processors.
+
         Parameters
         ----------
         cells : int numpy.ndarray of shape (3)
@@ -390,16 +545,56 @@ class Grid:
             Defaults to None, in which case materials are consecutively numbered.
         periodic : Boolean, optional
             Assume grid to be periodic. Defaults to True.
+        fname : str or pathlib.Path, optional
+            Raw binary (C-order) file to store the material indices in.
+            Defaults to None, in which case the material is kept in memory.
+        return_distance : bool, optional
+            Also return the distance of each cell center to the boundary
+            between its nearest and second-nearest seed. Defaults to False.
+
+        Returns
+        -------
+        new : damask.Grid
+            Grid with Voronoi tessellation.
+        distance : numpy.ndarray of shape (cells), optional
+            Distance to the grain boundary in meter, i.e. (d_2²-d_1²)/(2ǀs_2-s_1ǀ) for
+            the distances d_1 and d_2 to the nearest and second-nearest seeds s_1 and s_2.
+            Only returned if return_distance is True.
 
         """
-        coords = grid_filters.coordinates0_point(cells,size).reshape(-1,3)
-        KDTree = spatial.cKDTree(seeds,boxsize=size) if periodic else spatial.cKDTree(seeds)
-        devNull,material_ = KDTree.query(coords)
-
-        return Grid(material = (material_ if material is None else material[material_]).reshape(cells),
-                    size     = size,
-                    comments = util.execution_stamp('Grid','from_Voronoi_tessellation'),
-                   )
+        cells_,size_ = np.array(cells,dtype=int),np.array(size,dtype=float)
+        seeds_ = np.array(seeds,dtype=float).reshape(-1,3)
+        material_seeds = None if material is None else np.asarray(material).reshape(-1)
+        dtype = int if material is None else material_seeds.dtype
+        material_ = np.empty(cells_,dtype) if fname is None else \
+                    np.memmap(fname,dtype=dtype,mode='w+',shape=tuple(cells_))
+        distance = np.empty(cells_) if return_distance else None
+
+        KDTree = spatial.cKDTree(seeds_,boxsize=size_) if periodic else spatial.cKDTree(seeds_)
+        workers = int(os.environ.get('OMP_NUM_THREADS',-1))                                         # -1: all processors
+        k = 2 if return_distance and len(seeds_) > 1 else 1
+        x = [np.linspace(size_[i]/cells_[i]*.5,size_[i]-size_[i]/cells_[i]*.5,cells_[i]) for i in range(3)]
+        N_slab = max(1,2**22//int(np.prod(cells_[1:])))
+        for s in range(0,cells_[0],N_slab):
+            coords = np.stack(np.meshgrid(x[0][s:s+N_slab],x[1],x[2],indexing='ij'),axis=-1)
+            d,i = KDTree.query(coords,k,workers=workers)
+            material_[s:s+N_slab] = (i if k == 1 else i[...,0]) if material is None else \
+                                    material_seeds[i if k == 1 else i[...,0]]
+            if return_distance and k == 1:
+                distance[s:s+N_slab] = np.inf
+            elif return_distance:
+                v = coords[...,np.newaxis,:] - seeds_[i]
+                if periodic: v -= size_*np.round(v/size_)                                          # minimum image
+                with np.errstate(divide='ignore',invalid='ignore'):
+                    distance[s:s+N_slab] = (d[...,1]**2-d[...,0]**2) \
+                                         / (2.*np.linalg.norm(v[...,0,:]-v[...,1,:],axis=-1))
+        if fname is not None: material_.flush()
+
+        new = Grid(material = material_,
+                   size     = size_,
+                   comments = util.execution_stamp('Grid','from_Voronoi_tessellation'),
+                  )
+        return (new,distance) if return_distance else new
 
 
     _minimal_surface = \
@@ -519,11 +714,53 @@ class Grid:
             Compress with zlib algorithm. Defaults to True.
 
         """
-        v = VTK.from_rectilinear_grid(self.cells,self.size,self.origin)
-        v.add(self.material.flatten(order='F'),'material')
-        v.add_comments(self.comments)
-
-        v.save(fname if str(fname).endswith('.vtr') else str(fname)+'.vtr',parallel=False,compress=compress)
+        def encode(data):
+            """Binary representation (header and data) of an array."""
+            raw = data.astype(data.dtype.newbyteorder('<')).tobytes(order='F')
+            if not compress:
+                return np.array([len(raw)],'<u8').tobytes() + raw
+            with ThreadPoolExecutor(int(os.environ.get('OMP_NUM_THREADS',1))) as executor:
+                blocks = list(executor.map(partial(zlib.compress,level=1),
+                                           [raw[i:i+2**15] for i in range(0,len(raw),2**15)]))
+            header = [len(blocks),2**15,len(raw)-(len(blocks)-1)*2**15 if blocks else 0]
+            return np.array(header+[len(b) for b in blocks],'<u8').tobytes() + b''.join(blocks)
+
+        vtk_type = {v:k for k,v in _vtk_types.items() if k != 'String'}
+        blocks = []
+        def appended(data,name,vtk_type,tag='DataArray',extra=''):
+            """XML element of an appended array."""
+            offset = sum(map(len,blocks))
+            blocks.append(encode(data))
+            return f'<{tag} type="{vtk_type}" Name="{name}"{extra} format="appended" offset="{offset}"/>'
+
+        material = np.asarray(self.material)
+        extent = ' '.join([f'0 {c}' for c in self.cells])
+        xml = ['<?xml version="1.0"?>',
+               '<VTKFile type="RectilinearGrid" version="0.1" byte_order="LittleEndian" header_type="UInt64"'
+               +(' compressor="vtkZLibDataCompressor">' if compress else '>'),
+               f'  <RectilinearGrid WholeExtent="{extent}">']
+        if self.comments:
+            comments = np.frombuffer(''.join([c+'\0' for c in self.comments]).encode(),np.uint8)
+            xml += ['    <FieldData>',
+                    '      '+appended(comments,'comments','String','Array',f' NumberOfTuples="{len(self.comments)}"'),
+                    '    </FieldData>']
+        xml += [f'  <Piece Extent="{extent}">',
+                '    <CellData>',
+                '      '+appended(material,'material',vtk_type[material.dtype.kind+str(material.dtype.itemsize)]),
+                '    </CellData>',
+                '    <Coordinates>']
+        xml += ['      '+appended(np.linspace(self.origin[i],self.origin[i]+self.size[i],self.cells[i]+1),n,'Float64')
+                for i,n in enumerate(['x','y','z'])]
+        xml += ['    </Coordinates>',
+                '  </Piece>',
+                '  </RectilinearGrid>',
+                '  <AppendedData encoding="raw">',
+                '   _']
+
+        with open(fname if str(fname).endswith('.vtr') else str(fname)+'.vtr','wb') as f:
+            f.write('\n'.join(xml).encode())
+            for b in blocks: f.write(b)
+            f.write(b'\n  </AppendedData>\n</VTKFile>\n')
 
 
     def save_ASCII(self,fname):
@@ -603,7 +840,7 @@ class Grid:
         coords_rot = R.broadcast_to(tuple(self.cells))@coords
 
         with np.errstate(all='ignore'):
-            mask = np.sum(np.power(coords_rot/r,2.0**np.array(exponent)),axis=-1) > 1.0
+            mask = np.sum(np.power(np.abs(coords_rot)/r,2.0**np.array(exponent)),axis=-1) > 1.0
 
         if periodic:                                                                                # translate back to center
             mask = np.roll(mask,((c/self.size-0.5)*self.cells).round().astype(int),(0,1,2))
@@ -617,6 +854,235 @@ class Grid:
                    )
 
 
+    def add_primitives(self,dimensions,centers,exponents,fills=None,R=None,periodic=True):
+        """
+        Insert many primitive geometric objects at given positions.
+
+        The primitives are inserted in the given order, i.e. later primitives
+        replace earlier ones where they overlap. The result is the same as for
+        successive calls of add_primitive, but only the cells within the bounding
+        box of each primitive are evaluated.
+
+        Parameters
+        ----------
+        dimensions : int or float numpy.ndarray of shape (N,3)
+            Dimensions (diameter/side length) of the primitives. If given as
+            integers, cell centers are addressed.
+            If given as floats, coordinates are addressed.
+        centers : int or float numpy.ndarray of shape (N,3)
+            Centers of the primitives. If given as integers, cell centers are addressed.
+            If given as floats, coordinates in space are addressed.
+        exponents : numpy.ndarray of shape (N,3) or float
+            Exponents for the three axes.
+            0 gives octahedron (ǀxǀ^(2^0) + ǀyǀ^(2^0) + ǀzǀ^(2^0) < 1)
+            1 gives sphere     (ǀxǀ^(2^1) + ǀyǀ^(2^1) + ǀzǀ^(2^1) < 1)
+        fills : numpy.ndarray of shape (N), optional
+            Fill values for the primitives.
+            Defaults to material.max()+1,...,material.max()+N.
+        R : damask.Rotation of shape (N), optional
+            Rotations of the primitives. Defaults to no rotation.
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+
+        """
+        centers_ = np.array(centers).reshape(-1,3)
+        N = len(centers_)
+        dimensions_,exponents_ = np.array(dimensions),np.array(exponents)
+        fills_ = np.nanmax(self.material)+1+np.arange(N) if fills is None else np.broadcast_to(fills,N)
+        rotations = np.broadcast_to(np.eye(3) if R is None else R.as_matrix(),(N,3,3))
+
+        delta = self.size/self.cells
+        r = np.broadcast_to(dimensions_/2.0*delta if dimensions_.dtype in np.sctypes['int'] else dimensions_/2.0,(N,3))
+        c = (centers_ + .5)*self.size/self.cells if centers_.dtype in np.sctypes['int'] else centers_ - self.origin
+        p = np.broadcast_to(2.0**exponents_,(N,3))
+        offset = .5*self.size + (.5*delta if centers_.dtype in np.sctypes['int'] else 0.)                # primitive at center ...
+        shift = ((c/self.size-.5)*self.cells).round().astype(int)                                      # ... rolled by whole cells
+
+        dtype = float if self.material.dtype in np.sctypes['float'] or np.any(fills_ != np.round(fills_)) else \
+                np.promote_types(self.material.dtype,Grid._minimal_dtype(np.array(fills_).astype(int)))
+        material = self._empty(self.cells,dtype)
+        material[...] = self.material
+
+        for n in range(N):
+            extent = np.abs(rotations[n]).T @ r[n]                                                # bounding box of rotated primitive
+            lo,hi = (offset-extent if periodic else c[n]-extent)/delta-.5,(offset+extent if periodic else c[n]+extent)/delta-.5
+            u = [np.arange(max(0,int(np.floor(lo[i]))),min(self.cells[i]-1,int(np.ceil(hi[i])))+1) for i in range(3)]
+            if any(len(u_) == 0 for u_ in u): continue
+
+            x = np.stack(np.meshgrid(*[(u[i]+.5)*delta[i] - (offset[i] if periodic else c[n,i]) for i in range(3)],
+                                     indexing='ij'),axis=-1)
+            idx = np.ix_(*[(u[i]+shift[n,i])%self.cells[i] if periodic else u[i] for i in range(3)])
+            with np.errstate(all='ignore'):
+                outside = np.sum(np.power(np.abs(x@rotations[n].T)/r[n],p[n]),axis=-1) > 1.0
+            material[idx] = np.where(outside,material[idx],fills_[n])
+
+        return Grid(material = material,
+                    size     = self.size,
+                    origin   = self.origin,
+                    comments = self.comments+[util.execution_stamp('Grid','add_primitives')],
+                   )
+
+
+    @staticmethod
+    def _minimal_dtype(material):
+        """Smallest data type that can represent the given material indices."""
+        material_ = np.asarray(material)
+        if material_.dtype in np.sctypes['float'] or material_.size == 0:
+            return material_.dtype
+        return np.promote_types(np.min_scalar_type(np.min(material_)),np.min_scalar_type(np.max(material_)))
+
+
+    def _empty(self,shape,dtype):
+        """
+        Allocate a material array.
+
+        The array is memory-mapped to an anonymous temporary file
+        (located next to the current backing file) if the material
+        of this grid is memory-mapped.
+
+        """
+        if not isinstance(self.material,np.memmap):
+            return np.empty(shape,dtype)
+        directory = None if self.material.filename is None else os.path.dirname(self.material.filename)
+        return np.memmap(tempfile.TemporaryFile(dir=directory),dtype=dtype,mode='w+',shape=tuple(shape))
+
+
+    def _remap(self,idx,fill=None,dtype=None):
+        """
+        Assemble material from one-dimensional index maps.
+
+        The new material at (i,j,k) is material[idx[0][i],idx[1][j],idx[2][k]].
+        The grid is processed in slabs along x.
+
+        Parameters
+        ----------
+        idx : sequence of three numpy.ndarray of shape (:)
+            Index maps along x, y, and z. Negative entries denote background.
+        fill : int or float, optional
+            Material index of the background.
+        dtype : numpy.dtype, optional
+            Data type of new material. Defaults to data type of material.
+
+        Returns
+        -------
+        material : numpy.ndarray or numpy.memmap of shape (len(idx[0]),len(idx[1]),len(idx[2]))
+            Remapped material.
+
+        """
+        cells = tuple(len(i) for i in idx)
+        material = self._empty(cells,self.material.dtype if dtype is None else dtype)
+        background = [(i<0) for i in idx]
+        idx_ = [np.clip(i,0,None) for i in idx]
+
+        N_slab = max(1,2**22//max(cells[1]*cells[2],int(np.prod(self.cells[1:]))))
+        for x in range(0,cells[0],N_slab):
+            slab = self.material[idx_[0][x:x+N_slab]][:,idx_[1]][:,:,idx_[2]]
+            if fill is not None:
+                slab = np.where(background[0][x:x+N_slab,np.newaxis,np.newaxis]
+                               |background[1][np.newaxis,:,np.newaxis]
+                               |background[2][np.newaxis,np.newaxis,:],fill,slab)
+            material[x:x+N_slab] = slab
+
+        return material
+
+
+    @staticmethod
+    def _idx_mirror(cells,directions,reflect):
+        """Index maps for mirror."""
+        valid = ['x','y','z']
+        if not set(directions).issubset(valid):
+            raise ValueError(f'invalid direction {set(directions).difference(valid)} specified')
+
+        limits = [None,None] if reflect else [-2,0]
+        idx = [np.arange(c) for c in cells]
+        for i,d in enumerate(valid):
+            if d in directions: idx[i] = np.concatenate([idx[i],idx[i][limits[0]:limits[1]:-1]])
+        return idx
+
+    @staticmethod
+    def _idx_flip(cells,directions):
+        """Index maps for flip."""
+        valid = ['x','y','z']
+        if not set(directions).issubset(valid):
+            raise ValueError(f'invalid direction {set(directions).difference(valid)} specified')
+
+        return [np.arange(c)[::-1] if d in directions else np.arange(c) for d,c in zip(valid,cells)]
+
+    @staticmethod
+    def _idx_scale(cells,cells_new,periodic):
+        """Index maps for scale."""
+        return [ndimage.interpolation.zoom(np.arange(c_old),c_new/c_old,output=int,order=0,
+                                           mode=('wrap' if periodic else 'nearest'),prefilter=False)
+                for c_old,c_new in zip(cells,cells_new)]                                            # separable nearest neighbor
+
+    @staticmethod
+    def _idx_canvas(cells,cells_new,offset):
+        """Index maps for canvas, negative entries denote background."""
+        idx = [np.arange(c)+o for c,o in zip(cells if cells_new is None else cells_new,np.broadcast_to(offset,3))]
+        return [np.where((0<=i)&(i<c),i,-1) for i,c in zip(idx,cells)]
+
+
+    def lazy(self):
+        """
+        Start a lazy pipeline of grid operations.
+
+        mirror, flip, scale, canvas, and substitute are recorded
+        and merged into a single remapping of the material indices,
+        which is evaluated in one pass by 'compute'.
+
+        Returns
+        -------
+        pipeline : damask._grid.LazyGrid
+            Pipeline operating on this grid.
+
+        Examples
+        --------
+        >>> import damask
+        >>> g = damask.Grid.from_Voronoi_tessellation([8,8,8],[1,1,1],np.random.rand(4,3))
+        >>> g.lazy().canvas([16,8,8]).mirror('z').substitute([0],[5]).compute()
+
+        """
+        return LazyGrid(self)
+
+
+    def to_memmap(self,fname=None,dtype=None):
+        """
+        Store material indices in a memory-mapped file.
+
+        Operations on grids with memory-mapped material (mirror, flip, scale,
+        canvas, and substitute) process slabs and store their results in
+        memory-mapped temporary files.
+
+        Parameters
+        ----------
+        fname : str or pathlib.Path, optional
+            Raw binary (C-order) file to store the material indices in.
+            Defaults to an anonymous temporary file.
+        dtype : numpy.dtype, optional
+            Data type of material indices. Defaults to the smallest
+            integer type that can represent all material indices.
+
+        Returns
+        -------
+        grid : damask.Grid
+            Grid with memory-mapped material.
+
+        """
+        dtype_ = Grid._minimal_dtype(self.material) if dtype is None else dtype
+        material = np.memmap(tempfile.TemporaryFile() if fname is None else fname,
+                             dtype=dtype_,mode='w+',shape=tuple(self.cells))
+        N_slab = max(1,2**22//int(np.prod(self.cells[1:])))
+        for x in range(0,self.cells[0],N_slab):
+            material[x:x+N_slab] = self.material[x:x+N_slab]
+        material.flush()
+
+        return Grid(material = material,
+                    size     = self.size,
+                    origin   = self.origin,
+                    comments = self.comments,
+                   )
+
+
     def mirror(self,directions,reflect=False):
         """
         Mirror grid along given directions.
@@ -630,19 +1096,7 @@ class Grid:
             Reflect (include) outermost layers. Defaults to False.
 
         """
-        valid = ['x','y','z']
-        if not set(directions).issubset(valid):
-            raise ValueError(f'invalid direction {set(directions).difference(valid)} specified')
-
-        limits = [None,None] if reflect else [-2,0]
-        mat = self.material.copy()
-
-        if 'x' in directions:
-            mat = np.concatenate([mat,mat[limits[0]:limits[1]:-1,:,:]],0)
-        if 'y' in directions:
-            mat = np.concatenate([mat,mat[:,limits[0]:limits[1]:-1,:]],1)
-        if 'z' in directions:
-            mat = np.concatenate([mat,mat[:,:,limits[0]:limits[1]:-1]],2)
+        mat = self._remap(Grid._idx_mirror(self.cells,directions,reflect))
 
         return Grid(material = mat,
                     size     = self.size/self.cells*np.asarray(mat.shape),
@@ -662,11 +1116,7 @@ class Grid:
             Valid entries are 'x', 'y', 'z'.
 
         """
-        valid = ['x','y','z']
-        if not set(directions).issubset(valid):
-            raise ValueError(f'invalid direction {set(directions).difference(valid)} specified')
-
-        mat = np.flip(self.material, (valid.index(d) for d in directions if d in valid))
+        mat = self._remap(Grid._idx_flip(self.cells,directions))
 
         return Grid(material = mat,
                     size     = self.size,
@@ -687,21 +1137,83 @@ class Grid:
             Assume grid to be periodic. Defaults to True.
 
         """
-        return Grid(material = ndimage.interpolation.zoom(
-                                                           self.material,
-                                                           cells/self.cells,
-                                                           output=self.material.dtype,
-                                                           order=0,
-                                                           mode=('wrap' if periodic else 'nearest'),
-                                                           prefilter=False
-                                                          ),
+        return Grid(material = self._remap(Grid._idx_scale(self.cells,cells,periodic)),
                     size     = self.size,
                     origin   = self.origin,
                     comments = self.comments+[util.execution_stamp('Grid','scale')],
                    )
 
 
-    def clean(self,stencil=3,selection=None,periodic=True):
+    @staticmethod
+    def _mode(stack):
+        """
+        Most frequent value along the first axis.
+
+        Ties are resolved in favor of the smallest value.
+
+        Parameters
+        ----------
+        stack : numpy.ndarray of shape (:,...)
+            Values to vote on. Sorted in place.
+
+        Returns
+        -------
+        mode : numpy.ndarray of shape stack.shape[1:]
+            Most frequent value.
+
+        """
+        stack.sort(axis=0)
+        idx = np.arange(len(stack)).reshape((-1,)+(1,)*(stack.ndim-1))
+        new = np.ones(stack.shape,dtype=bool)
+        new[1:] = stack[1:] != stack[:-1]
+        run_length = idx - np.maximum.accumulate(np.where(new,idx,0),axis=0)                        # first maximum is smallest value
+        return np.take_along_axis(stack,np.argmax(run_length,axis=0)[np.newaxis],0)[0]
+
+
+    @staticmethod
+    def _most_frequent(material,stencil,periodic):
+        """
+        Most frequent value within a cubic stencil around each cell.
+
+        Ties are resolved in favor of the smallest value.
+        Slabs along the first axis are processed in OMP_NUM_THREADS threads.
+
+        Parameters
+        ----------
+        material : numpy.ndarray of shape (:,:,:)
+            Field values.
+        stencil : int
+            Edge length of the stencil.
+        periodic : Boolean
+            Assume field to be periodic.
+
+        Returns
+        -------
+        most_frequent : numpy.ndarray of shape material.shape
+            Most frequent value in the neighborhood of each cell.
+
+        """
+        cells   = material.shape
+        before  = stencil//2
+        padded  = np.pad(material,[(before,stencil-1-before)]*3,mode='wrap' if periodic else 'edge')
+        offsets = np.array(np.meshgrid(*[np.arange(stencil)]*3,indexing='ij')).reshape(3,-1).T
+        N_slab  = max(1,2**22//(len(offsets)*cells[1]*cells[2]))
+        most_frequent = np.empty_like(material)
+
+        def process_slab(x):
+            N = min(N_slab,cells[0]-x)
+            neighbors = np.empty((len(offsets),N)+cells[1:],dtype=material.dtype)
+            for n,(i,j,k) in enumerate(offsets):
+                neighbors[n] = padded[x+i:x+i+N,j:j+cells[1],k:k+cells[2]]
+            most_frequent[x:x+N] = Grid._mode(neighbors)
+
+        with ThreadPoolExecutor(int(os.environ.get('OMP_NUM_THREADS',1))) as executor:
+            list(executor.map(process_slab,range(0,cells[0],N_slab)))
+
+        return most_frequent
+
+
+    def clean(self,stencil=3,selection=None,periodic=True,iterations=1):
         """
         Smooth grid by selecting most frequent material index within given stencil at each location.
 
@@ -713,34 +1225,235 @@ class Grid:
             Field values that can be altered. Defaults to all.
         periodic : Boolean, optional
             Assume grid to be periodic. Defaults to True.
+        iterations : int, optional
+            Number of smoothing passes. Defaults to 1.
 
         """
-        def mostFrequent(arr,selection=None):
-            me = arr[arr.size//2]
-            if selection is None or me in selection:
-                unique, inverse = np.unique(arr, return_inverse=True)
-                return unique[np.argmax(np.bincount(inverse))]
+        material = self.material
+        for i in range(iterations):
+            if selection is None:
+                material = Grid._most_frequent(material,stencil,periodic)
             else:
-                return me
-
-        return Grid(material = ndimage.filters.generic_filter(
-                                                               self.material,
-                                                               mostFrequent,
-                                                               size=(stencil if selection is None else stencil//2*2+1,)*3,
-                                                               mode=('wrap' if periodic else 'nearest'),
-                                                               extra_keywords=dict(selection=selection),
-                                                              ).astype(self.material.dtype),
+                material = np.where(np.isin(material,selection),
+                                    Grid._most_frequent(material,stencil//2*2+1,periodic),
+                                    material)
+
+        return Grid(material = material,
                     size     = self.size,
                     origin   = self.origin,
                     comments = self.comments+[util.execution_stamp('Grid','clean')],
                    )
 
 
+    @staticmethod
+    def _coarsen(material,periodic):
+        """
+        Most frequent value within blocks of 2x2x2 cells.
+
+        Ties are resolved in favor of the smallest value.
+        Directions with a single cell are not coarsened.
+
+        Parameters
+        ----------
+        material : numpy.ndarray of shape (:,:,:)
+            Field values.
+        periodic : Boolean
+            Assume field to be periodic.
+            Blocks of odd dimensions wrap around or are padded with the last layer.
+
+        Returns
+        -------
+        coarse : numpy.ndarray of shape (ceil(material.shape/2))
+            Most frequent value in each block.
+
+        """
+        factor = np.where(np.array(material.shape) > 1,2,1)
+        padded = np.pad(material,[(0,c%f) for c,f in zip(material.shape,factor)],mode='wrap' if periodic else 'edge')
+        cells  = np.array(padded.shape)//factor
+        blocks = padded.reshape(cells[0],factor[0],cells[1],factor[1],cells[2],factor[2]) \
+                       .transpose(1,3,5,0,2,4).reshape((-1,)+tuple(cells))
+        return Grid._mode(blocks)
+
+
+    def pyramid(self,levels,periodic=True):
+        """
+        Successively coarsened grids.
+
+        Each level is derived from the previous one by a majority vote
+        over blocks of 2x2x2 cells, the total work is therefore
+        proportional to the number of cells. The coarsened material
+        indices are cached.
+
+        Parameters
+        ----------
+        levels : int
+            Number of coarsened grids.
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+
+        Returns
+        -------
+        pyramid : list of damask.Grid
+            Grids with ceil(cells/2), ceil(cells/4), ... cells.
+
+        """
+        materials = self._pyramid.setdefault(periodic,[])
+        while len(materials) < levels:
+            materials.append(Grid._coarsen(materials[-1] if materials else self.material,periodic))
+
+        return [Grid(material = m,
+                     size     = self.size,
+                     origin   = self.origin,
+                     comments = self.comments+[util.execution_stamp('Grid','pyramid')],
+                    ) for m in materials[:levels]]
+
+
+    @staticmethod
+    def _distance_transform(mask,sampling=None,periodic=True,return_distances=True,return_indices=False):
+        """
+        Exact Euclidean distance transform.
+
+        For periodic fields, the field is extended periodically only as far
+        as required, i.e. by the largest non-periodic distance.
+
+        Parameters
+        ----------
+        mask : numpy.ndarray of shape (:,:,:)
+            Cells to be assigned (True) and target cells (False).
+        sampling : numpy.ndarray of shape (3), optional
+            Cell size along each direction. Defaults to 1.
+        periodic : Boolean, optional
+            Assume field to be periodic. Defaults to True.
+        return_distances : bool, optional
+            Return the distance to the closest target cell. Defaults to True.
+        return_indices : bool, optional
+            Return the index of the closest target cell. Defaults to False.
+
+        Returns
+        -------
+        distances : numpy.ndarray of shape mask.shape
+            Distance to the closest target cell, infinity if there is none.
+        indices : numpy.ndarray of shape (3,mask.shape)
+            Index of the closest target cell, the cell itself if there is none.
+
+        """
+        sampling_ = np.ones(3) if sampling is None else np.asarray(sampling,dtype=float)
+        shape = np.array(mask.shape)
+
+        if mask.all() or not mask.any():
+            distances = np.full(mask.shape,np.inf if mask.all() else 0.)
+            indices   = np.indices(mask.shape)
+        else:
+            mask_,crop = mask,(slice(None),)*3
+            if periodic:
+                pad = np.minimum(np.ceil(ndimage.distance_transform_edt(mask,sampling_).max()/sampling_).astype(int)+1,
+                                 shape)
+                mask_ = np.pad(mask,[(p,p) for p in pad],mode='wrap')
+                crop  = tuple(slice(p,p+c) for p,c in zip(pad,shape))
+            transformed = ndimage.distance_transform_edt(mask_,sampling_,return_indices=return_indices)
+            distances,indices = transformed if return_indices else (transformed,None)
+            distances = distances[crop]
+            if return_indices:
+                indices = indices[(slice(None),)+crop]
+                if periodic: indices = (indices-pad.reshape(3,1,1,1)) % shape.reshape(3,1,1,1)
+
+        if return_distances and return_indices:
+            return distances,indices
+        return distances if return_distances else indices
+
+
+    def grain_growth(self,N=1,d=1.,immutable=[]):
+        """
+        Smoothen interface roughness by simulated curvature flow.
+
+        The interfaces of each initially sharply bounded grain volume are
+        diffused within the periodic domain up to a given distance 'd' cells.
+        The new geometry is assembled by selecting at each cell that
+        material index for which the concentration remains largest.
+
+        Parameters
+        ----------
+        N : int, optional
+            Number of curvature flow iterations. Defaults to 1.
+        d : float, optional
+            Diffusion distance in cells. Defaults to 1.
+        immutable : list of ints, optional
+            Material indices that remain unchanged and are not grown into.
+
+        """
+        material = np.tile(self.material,np.where(self.cells == 1,2,1))                            # at least two cells along each direction
+        cells = np.array(material.shape)
+        workers = int(os.environ.get('OMP_NUM_THREADS',1))
+
+        X,Y,Z = np.meshgrid(*[np.minimum(np.arange(c),c-np.arange(c)) for c in cells],indexing='ij')  # periodic distance to origin
+        gauss = np.exp(-(X*X + Y*Y + Z*Z)/(2.0*d*d),dtype=np.float32) \
+              / np.power(2.0*np.pi*d*d,(3.0 - np.count_nonzero(self.cells == 1))/2.,dtype=np.float32)
+        gauss = fft.rfftn(gauss.astype(float),workers=workers).astype(np.complex64)                                  # computed once for all iterations
+
+        is_immutable = np.isin(material,immutable)
+        material_original = np.copy(material)
+
+        for i in range(N):
+            interface = ndimage.maximum_filter(material,size=3,mode='wrap') \
+                     != ndimage.minimum_filter(material,size=3,mode='wrap')
+            if not interface.any(): break
+
+            boundary = ndimage.binary_dilation(interface,
+                                               structure=ndimage.generate_binary_structure(3,1),
+                                               iterations=int(round(d*2.))-1).astype(float)       # fat boundary
+            diffused = fft.irfftn((fft.rfftn(boundary,workers=workers).astype(np.complex64)*gauss).astype(np.complex128),
+                                  s=cells,workers=workers).astype(np.float32)
+
+            idx = Grid._distance_transform(diffused >= 0.95*np.amax(diffused),
+                                           return_distances=False,return_indices=True)              # closest bulk cell
+            material = material[idx[0],idx[1],idx[2]]
+
+            if len(immutable) > 0:
+                idx = ndimage.distance_transform_edt(np.isin(material,immutable),
+                                                     return_distances=False,return_indices=True)   # closest mutable cell
+                material = np.where(is_immutable,material_original,material[idx[0],idx[1],idx[2]])
+
+        return Grid(material = material[:self.cells[0],:self.cells[1],:self.cells[2]],
+                    size     = self.size,
+                    origin   = self.origin,
+                    comments = self.comments+[util.execution_stamp('Grid','grain_growth')],
+                   )
+
+
+    @staticmethod
+    def _unique(material):
+        """
+        Sorted unique material indices and their positions.
+
+        Avoids sorting for integer indices of moderate range.
+
+        Parameters
+        ----------
+        material : numpy.ndarray
+            Material indices.
+
+        Returns
+        -------
+        unique : numpy.ndarray of shape (:)
+            Sorted unique material indices.
+        inverse : numpy.ndarray of shape material.shape
+            Indices to reconstruct material from unique.
+
+        """
+        lo,hi = np.nanmin(material),np.nanmax(material)
+        if material.dtype in np.sctypes['int']+np.sctypes['uint'] and hi-lo < material.size:
+            idx = material.astype(np.int64)-lo
+            present = np.zeros(hi-lo+1,dtype=bool)
+            present[idx] = True
+            return np.flatnonzero(present)+lo, (np.cumsum(present)-1)[idx]
+        else:
+            unique,inverse = np.unique(material,return_inverse=True)
+            return unique, inverse.reshape(material.shape)
+
+
     def renumber(self):
         """Renumber sorted material indices as 0,...,N-1."""
-        _,renumbered = np.unique(self.material,return_inverse=True)
-
-        return Grid(material = renumbered.reshape(self.cells),
+        return Grid(material = Grid._unique(self.material)[1],
                     size     = self.size,
                     origin   = self.origin,
                     comments = self.comments+[util.execution_stamp('Grid','renumber')],
@@ -751,6 +1464,9 @@ class Grid:
         """
         Rotate grid (pad if required).
 
+        The material of each new cell is taken from the closest cell
+        center of the rotated grid (nearest-neighbor resampling).
+
         Parameters
         ----------
         R : damask.Rotation
@@ -760,16 +1476,28 @@ class Grid:
 
         """
         if fill is None: fill = np.nanmax(self.material) + 1
-        dtype = float if np.isnan(fill) or int(fill) != fill or self.material.dtype==np.float else int
-
-        material = self.material
-        # These rotations are always applied in the reference coordinate system, i.e. (z,x,z) not (z,x',z'')
-        # see https://www.cs.utexas.edu/~theshark/courses/cs354/lectures/cs354-14.pdf
-        for angle,axes in zip(R.as_Euler_angles(degrees=True)[::-1], [(0,1),(1,2),(0,1)]):
-            material_temp = ndimage.rotate(material,angle,axes,order=0,prefilter=False,output=dtype,cval=fill)
-            # avoid scipy interpolation errors for rotations close to multiples of 90°
-            material = material_temp if np.prod(material_temp.shape) != np.prod(material.shape) else \
-                       np.rot90(material,k=np.rint(angle/90.).astype(int),axes=axes)
+        dtype = float if np.isnan(fill) or int(fill) != fill or self.material.dtype in np.sctypes['float'] else \
+                np.promote_types(self.material.dtype,Grid._minimal_dtype(int(fill)))
+
+        M = R.as_matrix()
+        corners = np.array(np.meshgrid(*[[0,c] for c in self.cells],indexing='ij')).reshape(3,-1)
+        cells = (np.ptp(M.T@corners,axis=1)+.5).astype(int)                                        # bounding box of rotated grid
+        center,center_new = (self.cells-1)*.5,(cells-1)*.5
+        material = self._empty(cells,dtype)
+
+        N_slab = max(1,2**20//int(np.prod(cells[1:])))
+        def process_slab(x):
+            """Nearest cell center of the unrotated grid."""
+            i,j,k = np.meshgrid(np.arange(x,min(x+N_slab,cells[0]))-center_new[0],
+                                np.arange(cells[1])-center_new[1],
+                                np.arange(cells[2])-center_new[2],indexing='ij')
+            idx = [np.floor(M[l,0]*i+M[l,1]*j+M[l,2]*k+center[l]+.5).astype(np.int64) for l in range(3)]
+            outside = np.any([(idx[l]<0)|(idx[l]>=self.cells[l]) for l in range(3)],axis=0)
+            material[x:x+N_slab] = np.where(outside,fill,
+                                            self.material[tuple(np.clip(idx[l],0,self.cells[l]-1) for l in range(3))])
+
+        with ThreadPoolExecutor(int(os.environ.get('OMP_NUM_THREADS',1))) as executor:
+            list(executor.map(process_slab,range(0,cells[0],N_slab)))
 
         origin = self.origin-(np.asarray(material.shape)-self.cells)*.5 * self.size/self.cells
 
@@ -796,16 +1524,10 @@ class Grid:
         """
         if offset is None: offset = 0
         if fill is None: fill = np.nanmax(self.material) + 1
-        dtype = float if int(fill) != fill or self.material.dtype in np.sctypes['float'] else int
-
-        canvas = np.full(self.cells if cells is None else cells,fill,dtype)
-
-        LL = np.clip( offset,           0,np.minimum(self.cells,     cells+offset))
-        UR = np.clip( offset+cells,     0,np.minimum(self.cells,     cells+offset))
-        ll = np.clip(-offset,           0,np.minimum(     cells,self.cells-offset))
-        ur = np.clip(-offset+self.cells,0,np.minimum(     cells,self.cells-offset))
+        dtype = float if int(fill) != fill or self.material.dtype in np.sctypes['float'] else \
+                np.promote_types(self.material.dtype,Grid._minimal_dtype(int(fill)))
 
-        canvas[ll[0]:ur[0],ll[1]:ur[1],ll[2]:ur[2]] = self.material[LL[0]:UR[0],LL[1]:UR[1],LL[2]:UR[2]]
+        canvas = self._remap(Grid._idx_canvas(self.cells,cells,offset),fill,dtype)
 
         return Grid(material = canvas,
                     size     = self.size/self.cells*np.asarray(canvas.shape),
@@ -814,7 +1536,57 @@ class Grid:
                    )
 
 
-    def substitute(self,from_material,to_material):
+    @staticmethod
+    def _substitute(material,from_material,to_material,out=None):
+        """
+        Map values of an array via a lookup table.
+
+        Parameters
+        ----------
+        material : numpy.ndarray of shape (:,:,:)
+            Values to map.
+        from_material : numpy.ndarray of shape (:)
+            Values to be substituted. The last occurrence counts for duplicates.
+        to_material : numpy.ndarray of shape from_material.shape
+            New values.
+        out : numpy.ndarray of shape material.shape, optional
+            Array to store the result in. May be material itself.
+
+        Returns
+        -------
+        substituted : numpy.ndarray of shape material.shape
+            Mapped values. Values not contained in from_material are unchanged.
+
+        """
+        keys,idx = np.unique(np.asarray(from_material)[::-1],return_index=True)
+        values   = np.asarray(to_material)[::-1][idx]
+        if out is None: out = np.empty_like(material,dtype=np.result_type(material,values))
+        if len(keys) == 0:
+            out[...] = material
+            return out
+
+        lo = min(keys[0], np.nanmin(material))
+        hi = max(keys[-1],np.nanmax(material))
+        dense = material.dtype in np.sctypes['int']+np.sctypes['uint'] \
+            and keys.dtype in np.sctypes['int']+np.sctypes['uint'] \
+            and hi-lo < material.size + len(keys)
+        if dense:
+            lut = np.arange(lo,hi+1,dtype=out.dtype)
+            lut[keys.astype(np.int64)-lo] = values
+
+        N_slab = max(1,2**22//(material.size//material.shape[0]))
+        for x in range(0,material.shape[0],N_slab):
+            slab = material[x:x+N_slab]
+            if dense:
+                out[x:x+N_slab] = lut[slab.astype(np.int64)-lo]
+            else:
+                i = np.minimum(np.searchsorted(keys,slab),len(keys)-1)
+                out[x:x+N_slab] = np.where(keys[i] == slab,values[i],slab)
+
+        return out
+
+
+    def substitute(self,from_material,to_material,inplace=False):
         """
         Substitute material indices.
 
@@ -824,29 +1596,34 @@ class Grid:
             Material indices to be substituted.
         to_material : iterable of ints
             New material indices.
+        inplace : Boolean, optional
+            Modify material of this grid instead of returning a new grid.
+            Avoids a temporary copy of the material array. Defaults to False.
 
         """
-        def mp(entry,mapper):
-            return mapper[entry] if entry in mapper else entry
-
-        mp = np.vectorize(mp)
-        mapper = dict(zip(from_material,to_material))
-
-        return Grid(material = mp(self.material,mapper).reshape(self.cells),
-                    size     = self.size,
-                    origin   = self.origin,
-                    comments = self.comments+[util.execution_stamp('Grid','substitute')],
-                   )
+        if not inplace:
+            material = None if not isinstance(self.material,np.memmap) else \
+                       self._empty(self.cells,np.promote_types(self.material.dtype,Grid._minimal_dtype(to_material)))
+            return Grid(material = Grid._substitute(self.material,from_material,to_material,material),
+                        size     = self.size,
+                        origin   = self.origin,
+                        comments = self.comments+[util.execution_stamp('Grid','substitute')],
+                       )
+
+        to_material_ = np.asarray(to_material)
+        if np.any(to_material_.astype(self.material.dtype) != to_material_):
+            raise ValueError(f'new material indices not representable as {self.material.dtype}')
+        Grid._substitute(self.material,from_material,to_material_,out=self.material)
+        self._pyramid = {}
+        self.comments = self.comments+[util.execution_stamp('Grid','substitute')]
+        return self
 
 
     def sort(self):
         """Sort material indices such that min(material) is located at (0,0,0)."""
-        a = self.material.flatten(order='F')
-        from_ma = pd.unique(a)
-        sort_idx = np.argsort(from_ma)
-        ma = np.unique(a)[sort_idx][np.searchsorted(from_ma,a,sorter = sort_idx)]
+        from_ma = pd.unique(self.material.flatten(order='F'))
 
-        return Grid(material = ma.reshape(self.cells,order='F'),
+        return Grid(material = Grid._substitute(self.material,from_ma,np.sort(from_ma)),
                     size     = self.size,
                     origin   = self.origin,
                     comments = self.comments+[util.execution_stamp('Grid','sort')],
@@ -876,19 +1653,17 @@ class Grid:
             Assume grid to be periodic. Defaults to True.
 
         """
-        def tainted_neighborhood(stencil,trigger):
-
-            me = stencil[stencil.shape[0]//2]
-            return np.any(stencil != me
-                          if len(trigger) == 0 else
-                          np.in1d(stencil,np.array(list(set(trigger) - {me}))))
-
         offset_ = np.nanmax(self.material)+1 if offset is None else offset
-        mask = ndimage.filters.generic_filter(self.material,
-                                              tainted_neighborhood,
-                                              size=1+2*vicinity,
-                                              mode='wrap' if periodic else 'nearest',
-                                              extra_keywords={'trigger':trigger})
+        kwargs  = dict(size=1+2*vicinity,mode='wrap' if periodic else 'nearest')
+
+        if len(trigger) == 0:
+            mask = ndimage.maximum_filter(self.material,**kwargs) != ndimage.minimum_filter(self.material,**kwargs)
+        else:
+            trigger_ = np.unique(trigger)
+            is_trigger = np.isin(self.material,trigger_)
+            rank = np.where(is_trigger,np.searchsorted(trigger_,self.material),-1).astype(np.int32)  # -1: no trigger
+            mask = ndimage.maximum_filter(rank,**kwargs) > rank                                   # (other) trigger in vicinity
+            mask|= ndimage.minimum_filter(np.where(is_trigger,rank,len(trigger_)),**kwargs) < rank
 
         return Grid(material = np.where(mask, self.material + offset_,self.material),
                     size     = self.size,
@@ -897,10 +1672,14 @@ class Grid:
                    )
 
 
-    def get_grain_boundaries(self,periodic=True,directions='xyz'):
+    def get_grain_boundaries(self,periodic=True,directions='xyz',return_areas=False):
         """
         Create VTK unstructured grid containing grain boundaries.
 
+        Only the nodes of boundary faces are included. The material
+        indices of the two grains separated by each face are stored as
+        cell data 'material' (in ascending order).
+
         Parameters
         ----------
         periodic : Boolean, optional
@@ -908,6 +1687,17 @@ class Grid:
         directions : iterable containing str, optional
             Direction(s) along which the boundaries are determined.
             Valid entries are 'x', 'y', 'z'. Defaults to 'xyz'.
+        return_areas : bool, optional
+            Also return the area of each boundary. Defaults to False.
+
+        Returns
+        -------
+        boundaries : damask.VTK
+            Grain boundary faces.
+        areas : damask.Table, optional
+            Material indices of the grains ('material') and area ('A') of each boundary.
+            Boundaries on periodic images are counted once.
+            Only returned if return_areas is True.
 
         """
         valid = ['x','y','z']
@@ -918,7 +1708,7 @@ class Grid:
              [0, np.prod(self.cells[:2]+1), np.prod(self.cells[:2]+1)+1,               1],
              [0, 1,                         self.cells[0]+1+1,                         self.cells[0]+1]] # offset for connectivity
 
-        connectivity = []
+        connectivity,pairs,areas = [],[],[]
         for i,d in enumerate(['x','y','z']):
             if d not in directions: continue
             mask = self.material != np.roll(self.material,1,i)
@@ -931,5 +1721,442 @@ class Grid:
             base_nodes = np.argwhere(mask.flatten(order='F')).reshape(-1,1)
             connectivity.append(np.block([base_nodes + o[i][k] for k in range(4)]))
 
-        coords = grid_filters.coordinates0_node(self.cells,self.size,self.origin).reshape(-1,3,order='F')
-        return VTK.from_unstructured_grid(coords,np.vstack(connectivity),'QUAD')
+            cell = np.array(np.unravel_index(base_nodes[:,0],self.cells+1,order='F'))                # cell above face
+            neighbor = cell.copy()
+            neighbor[i] -= 1                                                                        # cell below face
+            areas.append(np.where(cell[i] < self.cells[i],np.prod(np.delete(self.size/self.cells,i)),0.)) # periodic image
+            cell[i] %= self.cells[i]
+            pairs.append(np.sort(np.stack((self.material[tuple(neighbor)],self.material[tuple(cell)]),axis=-1),axis=-1))
+
+        nodes,connectivity = np.unique(np.vstack(connectivity),return_inverse=True)
+        x = [np.linspace(self.origin[i],self.size[i]+self.origin[i],self.cells[i]+1) for i in range(3)]
+        idx = np.unravel_index(nodes,self.cells+1,order='F')
+        boundaries = VTK.from_unstructured_grid(np.stack([x[i][idx[i]] for i in range(3)],axis=-1),
+                                                connectivity.reshape(-1,4),'QUAD')
+        pairs = np.vstack(pairs)
+        if len(pairs) > 0: boundaries.add(pairs,'material')                                         # no cell data without boundaries
+
+        if not return_areas:
+            return boundaries
+
+        unique,inverse = np.unique(pairs,axis=0,return_inverse=True)
+        return (boundaries,
+                Table(np.column_stack((unique,np.bincount(inverse.reshape(-1),np.hstack(areas),len(unique)))),
+                      {'material':2,'A':1},util.execution_stamp('Grid','get_grain_boundaries')))
+
+
+    def get_feature_distance(self,feature='boundary',neighborhood='neumann',periodic=True):
+        """
+        Euclidean distance to grain boundaries, triple lines, or quadruple points.
+
+        A cell belongs to a boundary, triple line, or quadruple point if at
+        least one, two, or three different foreign material indices are
+        present in its neighborhood.
+
+        Parameters
+        ----------
+        feature : {'boundary', 'triple line', 'quadruple point'}, optional
+            Structural feature. Defaults to 'boundary'.
+        neighborhood : {'neumann', 'moore'}, optional
+            Neighborhood consisting of the 6 face neighbors (von Neumann)
+            or all 26 neighbors (Moore). Defaults to 'neumann'.
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+
+        Returns
+        -------
+        distance : numpy.ndarray of shape (cells)
+            Distance of each cell center to the closest feature cell center in meter.
+
+        """
+        features = {'boundary':1,'triple line':2,'quadruple point':3}
+        if feature not in features:
+            raise ValueError(f'invalid feature "{feature}"')
+        if neighborhood == 'neumann':
+            offsets = np.vstack((np.eye(3,dtype=int),-np.eye(3,dtype=int)))
+        elif neighborhood == 'moore':
+            offsets = np.array([o for o in np.ndindex(3,3,3) if o != (1,1,1)])-1
+        else:
+            raise ValueError(f'invalid neighborhood "{neighborhood}"')
+
+        padded = np.pad(self.material,1,mode='wrap' if periodic else 'edge')
+        foreign = np.zeros(self.cells,dtype=np.uint8)                                               # number of foreign indices, up to 3
+        first,second = np.empty_like(self.material),np.empty_like(self.material)
+        for o in offsets:
+            neighbor = padded[tuple(slice(1+i,1+i+c) for i,c in zip(o,self.cells))]
+            new = (neighbor != self.material) & ((foreign == 0) | (neighbor != first)) \
+                                              & ((foreign <= 1) | (neighbor != second))
+            first  = np.where(new & (foreign == 0),neighbor,first)
+            second = np.where(new & (foreign == 1),neighbor,second)
+            foreign += new & (foreign < 3)
+
+        return Grid._distance_transform(foreign < features[feature],self.size/self.cells,periodic)
+
+
+    def split_disconnected(self,periodic=True,connectivity=6):
+        """
+        Assign new material indices to disconnected regions of the same material.
+
+        For each material, the region containing the first cell (in C order)
+        of the initial material keeps its index, further regions are
+        numbered consecutively starting at material.max() + 1.
+
+        Parameters
+        ----------
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+        connectivity : int, optional
+            Number of neighbors connected to a cell. Valid values are 6 (faces),
+            18 (faces and edges), and 26 (faces, edges, and corners). Defaults to 6.
+
+        """
+        if connectivity not in [6,18,26]:
+            raise ValueError(f'invalid connectivity {connectivity}')
+        rank = {6:1,18:2,26:3}[connectivity]
+        structure = ndimage.generate_binary_structure(3,rank)
+
+        materials,labels = Grid._unique(self.material)
+        labels = labels + 1
+        component = np.zeros(self.cells,dtype=np.int64)
+        component_material = [np.zeros(1,dtype=np.int64)]
+        N_components = 0
+        for i,bbox in enumerate(ndimage.find_objects(labels)):                                     # label within bounding box
+            mask = labels[bbox] == i+1
+            component_, N = ndimage.label(mask,structure)
+            component[bbox][mask] = component_[mask] + N_components
+            component_material.append(np.full(N,i))
+            N_components += N
+        component_material = np.concatenate(component_material)
+
+        pairs = [np.zeros((0,2),dtype=np.int64)]
+        if periodic:
+            for d in np.array(np.meshgrid(*[[-1,0,1]]*3,indexing='ij')).reshape(3,-1).T:
+                if np.sum(np.abs(d)) > rank or not np.any(d) or d[np.flatnonzero(d)[0]] < 0: continue
+                for i in np.flatnonzero(d):                                                         # faces across which d wraps
+                    face = [self.cells[i]-1 if d[i] == 1 else 0]
+                    a = np.take(component,face,i)
+                    b = np.roll(np.take(component,[(face[0]+d[i])%self.cells[i]],i),-d,(0,1,2))
+                    connected = (component_material[a] == component_material[b]) & (a != b)
+                    pairs.append(np.stack((a[connected],b[connected]),axis=1))
+        pairs = np.vstack(pairs)
+        graph = sparse.coo_matrix((np.ones(len(pairs)),(pairs[:,0],pairs[:,1])),shape=(N_components+1,)*2)
+        N_regions,region = csgraph.connected_components(graph,directed=False)
+        first_component = np.full(N_regions,N_components+1)
+        np.minimum.at(first_component,region,np.arange(N_components+1))
+        region = np.argsort(np.argsort(first_component))[region]                                   # order regions by first component
+
+        region_material = np.empty(N_regions,dtype=np.int64)
+        region_material[region] = component_material
+        first = np.zeros(N_regions,dtype=bool)
+        first[np.unique(region_material[1:],return_index=True)[1]+1] = True
+        first[0] = True                                                                             # background (no component)
+        new = np.where(first,materials[region_material],np.nanmax(self.material)+np.cumsum(~first))
+
+        return Grid(material = new[region[component]],
+                    size     = self.size,
+                    origin   = self.origin,
+                    comments = self.comments+[util.execution_stamp('Grid','split_disconnected')],
+                   )
+
+
+    def merge_by_disorientation(self,O,threshold,degrees=False,periodic=True):
+        """
+        Merge adjacent materials with similar orientation.
+
+        Neighboring materials whose disorientation angle is below
+        the threshold are combined. Each group of merged materials
+        is assigned its smallest material index.
+
+        Parameters
+        ----------
+        O : damask.Orientation of shape (:)
+            Orientation of each material, i.e. O[i] is the orientation of material index i.
+        threshold : float
+            Disorientation angle below which neighboring materials are merged.
+        degrees : bool, optional
+            Threshold is given in degrees. Defaults to False.
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+
+        """
+        pairs = self.get_neighbors(periodic)                                                        # disorientation of unique pairs only
+        merge = pairs[O[pairs[:,0]].disorientation(O[pairs[:,1]]).as_axis_angle(degrees=degrees,pair=True)[1] < threshold]
+
+        N = int(np.nanmax(self.material))+1
+        N_groups,group = csgraph.connected_components(sparse.coo_matrix((np.ones(len(merge)),(merge[:,0],merge[:,1])),
+                                                                        shape=(N,N)),directed=False)
+        smallest = np.full(N_groups,N)
+        np.minimum.at(smallest,group,np.arange(N))
+        changed = np.flatnonzero(smallest[group] != np.arange(N))
+
+        return Grid(material = Grid._substitute(self.material,changed,smallest[group][changed]),
+                    size     = self.size,
+                    origin   = self.origin,
+                    comments = self.comments+[util.execution_stamp('Grid','merge_by_disorientation')],
+                   )
+
+
+    def get_neighbors(self,periodic=True):
+        """
+        Pairs of face-adjacent materials.
+
+        Parameters
+        ----------
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+
+        Returns
+        -------
+        neighbors : numpy.ndarray of shape (:,2)
+            Sorted pairs of material indices sharing at least one cell face.
+
+        """
+        material,pairs = self.material,[]
+        for i in range(3):
+            if periodic:
+                a,b = material,np.roll(material,-1,i)
+            else:
+                a,b = np.take(material,np.arange(self.cells[i]-1),i),np.take(material,np.arange(1,self.cells[i]),i)
+            mask = a != b
+            pairs.append(np.sort(np.stack((a[mask],b[mask]),axis=1),axis=1))
+
+        return np.unique(np.vstack(pairs),axis=0)
+
+
+    def grain_statistics(self,periodic=True,return_neighbors=False):
+        """
+        Calculate volume, centroid, bounding box, and number of neighbors of each material.
+
+        Parameters
+        ----------
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+        return_neighbors : Boolean, optional
+            Return pairs of face-adjacent materials. Defaults to False.
+
+        Returns
+        -------
+        statistics : damask.Table
+            Columns 'material', volume 'V', 'centroid' (including origin),
+            first ('bbox_min') and one past the last ('bbox_max') cell index
+            along x,y,z, and number of neighbors 'N_neighbors'.
+            Bounding boxes do not wrap around periodic boundaries.
+        neighbors : numpy.ndarray of shape (:,2)
+            Sorted pairs of face-adjacent materials, returned if
+            return_neighbors is True.
+
+        Notes
+        -----
+        Centroids of periodic grids are the circular means of the cell centers.
+
+        """
+        materials,labels = Grid._unique(self.material)
+        labels = labels.astype(np.int64)
+        N = np.bincount(labels.flatten(),minlength=len(materials))
+
+        centroid = np.empty((len(materials),3))
+        for i in range(3):
+            x = np.broadcast_to(((np.arange(self.cells[i])+.5)/self.cells[i]).reshape([-1 if i==j else 1 for j in range(3)]),
+                                self.cells).flatten()
+            if periodic:
+                sin = np.bincount(labels.flatten(),np.sin(2.*np.pi*x),len(materials))
+                cos = np.bincount(labels.flatten(),np.cos(2.*np.pi*x),len(materials))
+                centroid[:,i] = .5 + np.arctan2(-sin,-cos)/(2.*np.pi)
+            else:
+                centroid[:,i] = np.bincount(labels.flatten(),x,len(materials))/N
+
+        bbox = np.array([[s.start for s in b]+[s.stop for s in b] for b in ndimage.find_objects(labels+1)])
+
+        neighbors = self.get_neighbors(periodic)
+        N_neighbors = np.bincount(np.searchsorted(materials,neighbors.flatten()),minlength=len(materials))
+
+        statistics = Table(pd.concat([pd.DataFrame(materials),
+                                      pd.DataFrame(N*np.prod(self.size/self.cells)),
+                                      pd.DataFrame(self.origin + centroid*self.size),
+                                      pd.DataFrame(bbox),
+                                      pd.DataFrame(N_neighbors)],axis=1),
+                           {'material':1,'V':1,'centroid':3,'bbox_min':3,'bbox_max':3,'N_neighbors':1},
+                           util.execution_stamp('Grid','grain_statistics'))
+
+        return (statistics,neighbors) if return_neighbors else statistics
+
+
+class LazyGrid:
+    """
+    Lazy pipeline of grid operations.
+
+    Geometric operations are composed into one index map per direction,
+    substitutions are collected and applied to the gathered material
+    indices. The new material is assembled slab-wise in a single pass.
+
+    """
+
+    def __init__(self,grid):
+        """
+        New pipeline operating on a grid.
+
+        Parameters
+        ----------
+        grid : damask.Grid
+            Grid to operate on.
+
+        """
+        self._grid     = grid
+        self._idx      = [np.arange(c) for c in grid.cells]                                         # negative: background -(level+1)
+        self._fills    = []
+        self._mappings = []
+        self._dtype    = grid.material.dtype
+        self.size      = grid.size
+        self.origin    = grid.origin
+        self.comments  = grid.comments
+
+
+    @property
+    def cells(self):
+        """Number of cells in x,y,z direction."""
+        return np.array([len(i) for i in self._idx])
+
+
+    def _chain(self,idx,function):
+        """Compose index maps of the pipeline with new index maps."""
+        new = copy.copy(self)
+        new._idx = [np.where(i<0,-len(self._fills)-1,old[np.clip(i,0,None)]) for old,i in zip(self._idx,idx)]
+        new.comments = self.comments+[util.execution_stamp('Grid',function)]
+        return new
+
+
+    def _slabs(self,idx):
+        """Gather material indices in slabs along x."""
+        background = [np.where(i<0,-i-1,-1) for i in idx]
+        idx_ = [np.clip(i,0,None) for i in idx]
+        fills = np.array(self._fills)
+        N_slab = max(1,2**22//max(len(idx[1])*len(idx[2]),int(np.prod(self._grid.cells[1:]))))
+        for x in range(0,len(idx[0]),N_slab):
+            slab = self._grid.material[idx_[0][x:x+N_slab]][:,idx_[1]][:,:,idx_[2]]
+            for from_material,to_material in self._mappings:
+                slab = Grid._substitute(slab,from_material,to_material)
+            if len(fills) > 0:
+                level = np.maximum(np.maximum(background[0][x:x+N_slab,np.newaxis,np.newaxis],
+                                              background[1][np.newaxis,:,np.newaxis]),
+                                   background[2][np.newaxis,np.newaxis,:])                          # most recent canvas counts
+                slab = np.where(level>=0,fills[level],slab)
+            yield x,slab
+
+
+    def _nanmax(self):
+        """Largest material index."""
+        return np.nanmax([np.nanmax(slab) for x,slab in self._slabs([np.unique(i) for i in self._idx])])
+
+
+    def mirror(self,directions,reflect=False):
+        """
+        Mirror grid along given directions.
+
+        Parameters
+        ----------
+        directions : iterable containing str
+            Direction(s) along which the grid is mirrored.
+            Valid entries are 'x', 'y', 'z'.
+        reflect : bool, optional
+            Reflect (include) outermost layers. Defaults to False.
+
+        """
+        new = self._chain(Grid._idx_mirror(self.cells,directions,reflect),'mirror')
+        new.size = self.size/self.cells*new.cells
+        return new
+
+
+    def flip(self,directions):
+        """
+        Flip grid along given directions.
+
+        Parameters
+        ----------
+        directions : iterable containing str
+            Direction(s) along which the grid is flipped.
+            Valid entries are 'x', 'y', 'z'.
+
+        """
+        return self._chain(Grid._idx_flip(self.cells,directions),'flip')
+
+
+    def scale(self,cells,periodic=True):
+        """
+        Scale grid to new cells.
+
+        Parameters
+        ----------
+        cells : numpy.ndarray of shape (3)
+            Number of cells in x,y,z direction.
+        periodic : Boolean, optional
+            Assume grid to be periodic. Defaults to True.
+
+        """
+        return self._chain(Grid._idx_scale(self.cells,cells,periodic),'scale')
+
+
+    def canvas(self,cells=None,offset=None,fill=None):
+        """
+        Crop or enlarge/pad grid.
+
+        Parameters
+        ----------
+        cells : numpy.ndarray of shape (3)
+            Number of cells  x,y,z direction.
+        offset : numpy.ndarray of shape (3)
+            Offset (measured in cells) from old to new grid [0,0,0].
+        fill : int or float, optional
+            Material index to fill the background. Defaults to material.max() + 1.
+
+        """
+        if offset is None: offset = 0
+        if fill is None: fill = self._nanmax() + 1
+
+        new = self._chain(Grid._idx_canvas(self.cells,cells,offset),'canvas')
+        new._fills  = self._fills+[fill]
+        new._dtype  = float if int(fill) != fill or self._dtype in np.sctypes['float'] else \
+                      np.promote_types(self._dtype,Grid._minimal_dtype(int(fill)))
+        new.size    = self.size/self.cells*new.cells
+        new.origin  = self.origin+offset*self.size/self.cells
+        return new
+
+
+    def substitute(self,from_material,to_material):
+        """
+        Substitute material indices.
+
+        Parameters
+        ----------
+        from_material : iterable of ints
+            Material indices to be substituted.
+        to_material : iterable of ints
+            New material indices.
+
+        """
+        new = copy.copy(self)
+        new._mappings = self._mappings+[(from_material,to_material)]
+        new._fills    = [Grid._substitute(np.array([f]),from_material,to_material)[0] for f in self._fills]
+        new._dtype    = np.result_type(self._dtype,np.asarray(to_material))
+        new.comments  = self.comments+[util.execution_stamp('Grid','substitute')]
+        return new
+
+
+    def compute(self):
+        """
+        Evaluate the pipeline.
+
+        Returns
+        -------
+        new : damask.Grid
+            Grid after all recorded operations.
+
+        """
+        material = self._grid._empty(self.cells,self._dtype)
+        for x,slab in self._slabs(self._idx):
+            material[x:x+len(slab)] = slab
+
+        return Grid(material = material,
+                    size     = self.size,
+                    origin   = self.origin,
+                    comments = self.comments,
+                   )
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 
 from . import Rotation
@@ -27,6 +29,110 @@ _parameter_doc = \
        """
 
 
+@lru_cache(maxsize=None)
+def _symmetry_operations(family):
+    """Quaternions of the symmetry operations of a crystal family."""
+    if family == 'cubic':
+        sym_quats =  [
+                      [ 1.0,            0.0,            0.0,            0.0            ],
+                      [ 0.0,            1.0,            0.0,            0.0            ],
+                      [ 0.0,            0.0,            1.0,            0.0            ],
+                      [ 0.0,            0.0,            0.0,            1.0            ],
+                      [ 0.0,            0.0,            0.5*np.sqrt(2), 0.5*np.sqrt(2) ],
+                      [ 0.0,            0.0,            0.5*np.sqrt(2),-0.5*np.sqrt(2) ],
+                      [ 0.0,            0.5*np.sqrt(2), 0.0,            0.5*np.sqrt(2) ],
+                      [ 0.0,            0.5*np.sqrt(2), 0.0,           -0.5*np.sqrt(2) ],
+                      [ 0.0,            0.5*np.sqrt(2),-0.5*np.sqrt(2), 0.0            ],
+                      [ 0.0,           -0.5*np.sqrt(2),-0.5*np.sqrt(2), 0.0            ],
+                      [ 0.5,            0.5,            0.5,            0.5            ],
+                      [-0.5,            0.5,            0.5,            0.5            ],
+                      [-0.5,            0.5,            0.5,           -0.5            ],
+                      [-0.5,            0.5,           -0.5,            0.5            ],
+                      [-0.5,           -0.5,            0.5,            0.5            ],
+                      [-0.5,           -0.5,            0.5,           -0.5            ],
+                      [-0.5,           -0.5,           -0.5,            0.5            ],
+                      [-0.5,            0.5,           -0.5,           -0.5            ],
+                      [-0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
+                      [ 0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
+                      [-0.5*np.sqrt(2), 0.0,            0.5*np.sqrt(2), 0.0            ],
+                      [-0.5*np.sqrt(2), 0.0,           -0.5*np.sqrt(2), 0.0            ],
+                      [-0.5*np.sqrt(2), 0.5*np.sqrt(2), 0.0,            0.0            ],
+                      [-0.5*np.sqrt(2),-0.5*np.sqrt(2), 0.0,            0.0            ],
+                    ]
+    elif family == 'hexagonal':
+        sym_quats =  [
+                      [ 1.0,            0.0,            0.0,            0.0            ],
+                      [-0.5*np.sqrt(3), 0.0,            0.0,           -0.5            ],
+                      [ 0.5,            0.0,            0.0,            0.5*np.sqrt(3) ],
+                      [ 0.0,            0.0,            0.0,            1.0            ],
+                      [-0.5,            0.0,            0.0,            0.5*np.sqrt(3) ],
+                      [-0.5*np.sqrt(3), 0.0,            0.0,            0.5            ],
+                      [ 0.0,            1.0,            0.0,            0.0            ],
+                      [ 0.0,           -0.5*np.sqrt(3), 0.5,            0.0            ],
+                      [ 0.0,            0.5,           -0.5*np.sqrt(3), 0.0            ],
+                      [ 0.0,            0.0,            1.0,            0.0            ],
+                      [ 0.0,           -0.5,           -0.5*np.sqrt(3), 0.0            ],
+                      [ 0.0,            0.5*np.sqrt(3), 0.5,            0.0            ],
+                    ]
+    elif family == 'tetragonal':
+        sym_quats =  [
+                      [ 1.0,            0.0,            0.0,            0.0            ],
+                      [ 0.0,            1.0,            0.0,            0.0            ],
+                      [ 0.0,            0.0,            1.0,            0.0            ],
+                      [ 0.0,            0.0,            0.0,            1.0            ],
+                      [ 0.0,            0.5*np.sqrt(2), 0.5*np.sqrt(2), 0.0            ],
+                      [ 0.0,           -0.5*np.sqrt(2), 0.5*np.sqrt(2), 0.0            ],
+                      [ 0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
+                      [-0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
+                    ]
+    elif family == 'orthorhombic':
+        sym_quats =  [
+                      [ 1.0,0.0,0.0,0.0 ],
+                      [ 0.0,1.0,0.0,0.0 ],
+                      [ 0.0,0.0,1.0,0.0 ],
+                      [ 0.0,0.0,0.0,1.0 ],
+                    ]
+    elif family == 'monoclinic':
+        sym_quats =  [
+                      [ 1.0,0.0,0.0,0.0 ],
+                      [ 0.0,0.0,1.0,0.0 ],
+                    ]
+    elif family == 'triclinic':
+        sym_quats =  [
+                      [ 1.0,0.0,0.0,0.0 ],
+                    ]
+    else:
+        raise KeyError(f'Crystal family "{family}" is unknown')
+
+    q = Rotation.from_quaternion(sym_quats,accept_homomorph=True).quaternion
+    q.flags.writeable = False
+    return q
+
+
+@lru_cache(maxsize=None)
+def _basis_real(a,b,c,alpha,beta,gamma):
+    """Orthogonal real space crystal basis for given lattice parameters."""
+    basis = np.array([
+                      [1,0,0],
+                      [np.cos(gamma),np.sin(gamma),0],
+                      [np.cos(beta),
+                       (np.cos(alpha)-np.cos(beta)*np.cos(gamma))                     /np.sin(gamma),
+                       np.sqrt(1 - np.cos(alpha)**2 - np.cos(beta)**2 - np.cos(gamma)**2
+                             + 2 * np.cos(alpha)    * np.cos(beta)    * np.cos(gamma))/np.sin(gamma)],
+                     ],dtype=float).T \
+          * np.array([a,b,c])
+    basis.flags.writeable = False
+    return basis
+
+
+@lru_cache(maxsize=None)
+def _basis_reciprocal(a,b,c,alpha,beta,gamma):
+    """Reciprocal (dual) crystal basis for given lattice parameters."""
+    basis = np.linalg.inv(_basis_real(a,b,c,alpha,beta,gamma).T)
+    basis.flags.writeable = False
+    return basis
+
+
 class Orientation(Rotation):
     """
     Representation of crystallographic orientation as combination of rotation and either crystal family or Bravais lattice.
@@ -353,79 +459,7 @@ class Orientation(Rotation):
     @property
     def symmetry_operations(self):
         """Symmetry operations as Rotations."""
-        if self.family == 'cubic':
-            sym_quats =  [
-                          [ 1.0,            0.0,            0.0,            0.0            ],
-                          [ 0.0,            1.0,            0.0,            0.0            ],
-                          [ 0.0,            0.0,            1.0,            0.0            ],
-                          [ 0.0,            0.0,            0.0,            1.0            ],
-                          [ 0.0,            0.0,            0.5*np.sqrt(2), 0.5*np.sqrt(2) ],
-                          [ 0.0,            0.0,            0.5*np.sqrt(2),-0.5*np.sqrt(2) ],
-                          [ 0.0,            0.5*np.sqrt(2), 0.0,            0.5*np.sqrt(2) ],
-                          [ 0.0,            0.5*np.sqrt(2), 0.0,           -0.5*np.sqrt(2) ],
-                          [ 0.0,            0.5*np.sqrt(2),-0.5*np.sqrt(2), 0.0            ],
-                          [ 0.0,           -0.5*np.sqrt(2),-0.5*np.sqrt(2), 0.0            ],
-                          [ 0.5,            0.5,            0.5,            0.5            ],
-                          [-0.5,            0.5,            0.5,            0.5            ],
-                          [-0.5,            0.5,            0.5,           -0.5            ],
-                          [-0.5,            0.5,           -0.5,            0.5            ],
-                          [-0.5,           -0.5,            0.5,            0.5            ],
-                          [-0.5,           -0.5,            0.5,           -0.5            ],
-                          [-0.5,           -0.5,           -0.5,            0.5            ],
-                          [-0.5,            0.5,           -0.5,           -0.5            ],
-                          [-0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
-                          [ 0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
-                          [-0.5*np.sqrt(2), 0.0,            0.5*np.sqrt(2), 0.0            ],
-                          [-0.5*np.sqrt(2), 0.0,           -0.5*np.sqrt(2), 0.0            ],
-                          [-0.5*np.sqrt(2), 0.5*np.sqrt(2), 0.0,            0.0            ],
-                          [-0.5*np.sqrt(2),-0.5*np.sqrt(2), 0.0,            0.0            ],
-                        ]
-        elif self.family == 'hexagonal':
-            sym_quats =  [
-                          [ 1.0,            0.0,            0.0,            0.0            ],
-                          [-0.5*np.sqrt(3), 0.0,            0.0,           -0.5            ],
-                          [ 0.5,            0.0,            0.0,            0.5*np.sqrt(3) ],
-                          [ 0.0,            0.0,            0.0,            1.0            ],
-                          [-0.5,            0.0,            0.0,            0.5*np.sqrt(3) ],
-                          [-0.5*np.sqrt(3), 0.0,            0.0,            0.5            ],
-                          [ 0.0,            1.0,            0.0,            0.0            ],
-                          [ 0.0,           -0.5*np.sqrt(3), 0.5,            0.0            ],
-                          [ 0.0,            0.5,           -0.5*np.sqrt(3), 0.0            ],
-                          [ 0.0,            0.0,            1.0,            0.0            ],
-                          [ 0.0,           -0.5,           -0.5*np.sqrt(3), 0.0            ],
-                          [ 0.0,            0.5*np.sqrt(3), 0.5,            0.0            ],
-                        ]
-        elif self.family == 'tetragonal':
-            sym_quats =  [
-                          [ 1.0,            0.0,            0.0,            0.0            ],
-                          [ 0.0,            1.0,            0.0,            0.0            ],
-                          [ 0.0,            0.0,            1.0,            0.0            ],
-                          [ 0.0,            0.0,            0.0,            1.0            ],
-                          [ 0.0,            0.5*np.sqrt(2), 0.5*np.sqrt(2), 0.0            ],
-                          [ 0.0,           -0.5*np.sqrt(2), 0.5*np.sqrt(2), 0.0            ],
-                          [ 0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
-                          [-0.5*np.sqrt(2), 0.0,            0.0,            0.5*np.sqrt(2) ],
-                        ]
-        elif self.family == 'orthorhombic':
-            sym_quats =  [
-                          [ 1.0,0.0,0.0,0.0 ],
-                          [ 0.0,1.0,0.0,0.0 ],
-                          [ 0.0,0.0,1.0,0.0 ],
-                          [ 0.0,0.0,0.0,1.0 ],
-                        ]
-        elif self.family == 'monoclinic':
-            sym_quats =  [
-                          [ 1.0,0.0,0.0,0.0 ],
-                          [ 0.0,0.0,1.0,0.0 ],
-                        ]
-        elif self.family == 'triclinic':
-            sym_quats =  [
-                          [ 1.0,0.0,0.0,0.0 ],
-                        ]
-        else:
-            raise KeyError(f'Crystal family "{self.family}" is unknown')
-
-        return Rotation.from_quaternion(sym_quats,accept_homomorph=True)
+        return Rotation(_symmetry_operations(self.family))
 
 
     @property
@@ -450,12 +484,19 @@ class Orientation(Rotation):
         if self.family is None:
             raise ValueError('Missing crystal symmetry')
 
-        eq   = self.equivalent
-        ok   = eq.in_FZ
-        ok  &= np.cumsum(ok,axis=0) == 1
-        loc  = np.where(ok)
-        sort = 0 if len(loc) == 1 else np.lexsort(loc[:0:-1])
-        return eq[ok][sort].reshape(self.shape)
+        q = self.quaternion.reshape(-1,4)
+        reduced = np.empty_like(q)
+        todo = np.arange(len(q))
+        for sym in self.symmetry_operations.quaternion:                                             # first operator that maps into FZ
+            eq = self.copy(rotation=Rotation(np.broadcast_to(sym,(len(todo),4)))*Rotation(q[todo]))
+            ok = eq.in_FZ
+            reduced[todo[ok]] = eq.quaternion[ok]
+            todo = todo[~ok]
+            if len(todo) == 0: break
+        else:
+            raise ValueError('orientation not mapped into fundamental zone')
+
+        return self.copy(rotation=reduced.reshape(self.quaternion.shape))
 
 
     @property
@@ -706,21 +747,15 @@ class Orientation(Rotation):
         """
         if None in self.parameters:
             raise KeyError('Missing crystal lattice parameters')
-        return np.array([
-                          [1,0,0],
-                          [np.cos(self.gamma),np.sin(self.gamma),0],
-                          [np.cos(self.beta),
-                           (np.cos(self.alpha)-np.cos(self.beta)*np.cos(self.gamma))                     /np.sin(self.gamma),
-                           np.sqrt(1 - np.cos(self.alpha)**2 - np.cos(self.beta)**2 - np.cos(self.gamma)**2
-                                 + 2 * np.cos(self.alpha)    * np.cos(self.beta)    * np.cos(self.gamma))/np.sin(self.gamma)],
-                         ],dtype=float).T \
-             * np.array([self.a,self.b,self.c])
+        return np.array(_basis_real(*self.parameters))
 
 
     @property
     def basis_reciprocal(self):
         """Calculate reciprocal (dual) crystal basis."""
-        return np.linalg.inv(self.basis_real.T)
+        if None in self.parameters:
+            raise KeyError('Missing crystal lattice parameters')
+        return np.array(_basis_reciprocal(*self.parameters))
 
 
     def in_SST(self,vector,proper=False):
@@ -930,7 +965,7 @@ class Orientation(Rotation):
         return rgb
 
 
-    def disorientation(self,other,return_operators=False):
+    def disorientation(self,other,return_operators=False,memory=2**28):
         """
         Calculate disorientation between myself and given other orientation.
 
@@ -943,6 +978,9 @@ class Orientation(Rotation):
         return_operators : bool, optional
             Return index pair of symmetrically equivalent orientations that result in disorientation axis falling into FZ.
             Defaults to False.
+        memory : int, optional
+            Approximate memory (in bytes) used for intermediate results.
+            Defaults to 2**28.
 
         Returns
         -------
@@ -954,6 +992,9 @@ class Orientation(Rotation):
         Notes
         -----
         Currently requires same crystal family for both orientations.
+        The orientation pairs are processed in chunks. Per pair, the symmetrically
+        equivalent orientations of self are tested one after the other against all
+        equivalents of other, the first valid combination is kept.
         For extension to cases with differing symmetry see  A. Heinz and P. Neumann 1991 and 10.1107/S0021889808016373.
 
         Examples
@@ -979,28 +1020,48 @@ class Orientation(Rotation):
             raise NotImplementedError('disorientation between different crystal families')
 
         blend = util.shapeblender(self.shape,other.shape)
-        s =  self.equivalent
-        o = other.equivalent
-
-        s_ = s.reshape((s.shape[0],1)+ self.shape).broadcast_to((s.shape[0],o.shape[0])+blend,mode='right')
-        o_ = o.reshape((1,o.shape[0])+other.shape).broadcast_to((s.shape[0],o.shape[0])+blend,mode='right')
-        r_ = s_.misorientation(o_)
-        _r = ~r_
-
-        forward = r_.in_FZ & r_.in_disorientation_FZ
-        reverse = _r.in_FZ & _r.in_disorientation_FZ
-        ok  = forward | reverse
-        ok &= (np.cumsum(ok.reshape((-1,)+ok.shape[2:]),axis=0) == 1).reshape(ok.shape)
-        r = np.where(np.any(forward[...,np.newaxis],axis=(0,1),keepdims=True),
-                     r_.quaternion,
-                     _r.quaternion)
-        loc  = np.where(ok)
-        sort = 0 if len(loc) == 2 else np.lexsort(loc[:1:-1])
-        quat = r[ok][sort].reshape(blend+(4,))
-
+        sym_s = self.symmetry_operations.quaternion
+        sym_o = other.symmetry_operations.quaternion
+        shape = (len(sym_s),len(sym_o))+blend
+        s = np.broadcast_to(self.quaternion.reshape(util.shapeshifter((len(sym_s),1)+self.shape,shape,'right')[2:]+(4,)),
+                            blend+(4,)).reshape(-1,4)
+        o = np.broadcast_to(other.quaternion.reshape(util.shapeshifter((1,len(sym_o))+other.shape,shape,'right')[2:]+(4,)),
+                            blend+(4,)).reshape(-1,4)
+
+        quat = np.empty((len(s),4))
+        loc  = np.empty((len(s),2),dtype=int)
+        N_chunk = max(1,memory//(len(sym_o)*512))                                                  # about 64 values per combination
+        for c in range(0,len(s),N_chunk):
+            N = len(s[c:c+N_chunk])
+            o_ = Rotation(np.broadcast_to(sym_o[:,np.newaxis],(len(sym_o),N,4))) \
+               * Rotation(np.broadcast_to(o[c:c+N_chunk],(len(sym_o),N,4)))
+            found   = np.zeros(N,dtype=bool)
+            forward_any = np.zeros(N,dtype=bool)
+            q_forward,q_reverse = np.empty((N,4)),np.empty((N,4))
+            for i,sym in enumerate(sym_s):
+                s_ = Rotation(np.broadcast_to(sym,(N,4))) * Rotation(s[c:c+N_chunk])
+                r_ = self.copy(rotation=o_*Rotation(np.broadcast_to((~s_).quaternion,(len(sym_o),N,4))))
+                _r = ~r_
+
+                forward = r_.in_FZ & r_.in_disorientation_FZ
+                reverse = _r.in_FZ & _r.in_disorientation_FZ
+                forward_any |= np.any(forward,axis=0)
+                ok  = (forward | reverse) & ~found
+                ok &= np.cumsum(ok,axis=0) == 1                                                     # first operator of other
+                j,k = np.where(ok)
+                q_forward[k] = r_.quaternion[j,k]
+                q_reverse[k] = _r.quaternion[j,k]
+                loc[c+k] = np.column_stack((np.full(len(k),i),j))
+                found[k] = True
+
+            if not found.all():
+                raise ValueError('no disorientation within fundamental zone')
+            quat[c:c+N] = np.where(forward_any[:,np.newaxis],q_forward,q_reverse)
+
+        quat = quat.reshape(blend+(4,))
         return (
                 (self.copy(rotation=quat),
-                 (np.vstack(loc[:2]).T)[sort].reshape(blend+(2,)))
+                 loc.reshape(blend+(2,)))
                 if return_operators else
                 self.copy(rotation=quat)
                )
@@ -1051,6 +1112,51 @@ class Orientation(Rotation):
                )
 
 
+    def average_by(self,labels,weights=None):
+        """
+        Return orientation average of all orientations with the same label.
+
+        Per label, the symmetrically equivalent orientations closest to
+        the first orientation of that label are averaged.
+
+        Parameters
+        ----------
+        labels : numpy.ndarray of shape (self.shape)
+            Label, e.g. grain ID, of each orientation.
+        weights : numpy.ndarray of shape (self.shape), optional
+            Relative weights of orientations.
+
+        Returns
+        -------
+        average : Orientation of shape (N_labels)
+            Weighted average of the orientations of each label,
+            ordered according to the sorted unique labels.
+
+        References
+        ----------
+        J.C. Glez and J. Driver, J. Appl. Cryst. 34:280-288, 2001
+        "Orientation distribution analysis in deformed grains"
+        https://doi.org/10.1107/S0021889801003077
+
+        """
+        if self.family is None:
+            raise ValueError('Missing crystal symmetry')
+
+        labels_ = np.asarray(labels).reshape(-1)
+        unique,first,inverse = np.unique(labels_,return_index=True,return_inverse=True)
+        q   = self.quaternion.reshape(-1,4)
+        ref = Rotation(q[first][inverse])
+        r   = np.empty_like(q)
+        m_min = np.full(len(q),np.inf)
+        for sym in self.symmetry_operations.quaternion:                                             # closest equivalent to reference
+            eq = Rotation(np.broadcast_to(sym,q.shape))*Rotation(q)
+            m  = eq.misorientation(ref).as_axis_angle()[...,3]
+            closer = m < m_min
+            r[closer],m_min[closer] = eq.quaternion[closer],m[closer]
+
+        return self.copy(rotation=Rotation(r).average_by(labels_,weights))
+
+
     def to_SST(self,vector,proper=False,return_operators=False):
         """
         Rotate vector to ensure it falls into (improper or proper) standard stereographic triangle of crystal symmetry.
@@ -12,11 +12,14 @@ from collections import defaultdict
 import h5py
 import numpy as np
 from numpy.lib import recfunctions as rfn
+from scipy import sparse
+from scipy.sparse import csgraph
 
 import damask
 from . import VTK
 from . import Table
 from . import Orientation
+from . import Grid
 from . import grid_filters
 from . import mechanics
 from . import tensor
@@ -90,6 +93,7 @@ class Result:
         self.fname = Path(fname).absolute()
 
         self._allow_modification = False
+        self._precision = np.float64
 
 
     def __repr__(self):
@@ -204,6 +208,29 @@ class Result:
         self._allow_modification = False
 
 
+    def set_precision(self,precision):
+        """
+        Set floating point precision of added datasets.
+
+        Derived quantities are calculated in double precision and
+        stored with the selected precision to reduce file size and I/O.
+        Quantities whose metadata demand a precision, e.g. rotations and
+        stretch tensors that require double precision for subsequent
+        calculations, are always stored as such. Overwritten datasets
+        (see allow_modification) keep their existing precision.
+
+        Parameters
+        ----------
+        precision : {'single', 'double'}
+            Floating point precision of datasets created by the add_* functions.
+            Defaults to 'double' for a newly opened file.
+
+        """
+        if precision not in ['single','double']:
+            raise ValueError(f'invalid precision "{precision}"')
+        self._precision = np.float32 if precision == 'single' else np.float64
+
+
     def incs_in_range(self,start,end):
         """
         Select all increments within a given range.
@@ -616,10 +643,11 @@ class Result:
                 'meta':  {
                           'Unit':        kwargs['unit'],
                           'Description': f"{kwargs['description']} (formula: {kwargs['formula']})",
-                          'Creator':     'add_calculation'
+                          'Creator':     'add_calculation',
+                          **({} if kwargs['precision'] is None else {'Precision': kwargs['precision']})
                           }
                  }
-    def add_calculation(self,label,formula,unit='n/a',description=None):
+    def add_calculation(self,label,formula,unit='n/a',description=None,precision=None):
         """
         Add result of a general formula.
 
@@ -633,10 +661,16 @@ class Result:
             Physical unit of the result.
         description : str, optional
             Human-readable description of the result.
+        precision : {'single', 'double'}, optional
+            Floating point precision of the result.
+            Defaults to None, i.e. the precision selected with set_precision.
 
         """
+        if precision not in [None,'single','double']:
+            raise ValueError(f'invalid precision "{precision}"')
         dataset_mapping  = {d:d for d in set(re.findall(r'#(.*?)#',formula))}                       # datasets used in the formula
-        args             = {'formula':formula,'label':label,'unit':unit,'description':description}
+        args             = {'formula':formula,'label':label,'unit':unit,'description':description,
+                            'precision':precision}
         self._add_generic_pointwise(self._add_calculation,dataset_mapping,args)
 
 
@@ -821,6 +855,219 @@ class Result:
         self._add_generic_pointwise(self._add_IPF_color,{'q':q},{'l':l})
 
 
+    @staticmethod
+    def _orientation(q,phase,p):
+        """Orientations of all points of given phase."""
+        try:
+            lattice = {'fcc':'cF','bcc':'cI','hex':'hP'}[q['meta'][p]['Lattice']]
+        except KeyError:
+            lattice =  q['meta'][p]['Lattice']
+        return Orientation(rotation=q['data'][phase==p],lattice=lattice)
+
+    @staticmethod
+    def _neighbor_disorientation(q,cells,phase):
+        """
+        Disorientation angles between periodic nearest neighbors.
+
+        Returns
+        -------
+        pairs : numpy.ndarray of shape (N,2)
+            Point indices of neighbor pairs.
+        angles : numpy.ndarray of shape (N)
+            Disorientation angle in radians, NaN for neighbors of different phases.
+
+        """
+        idx = np.arange(np.prod(cells)).reshape(cells,order='F')
+        pairs = np.vstack([np.stack([idx.flatten(),np.roll(idx,-1,d).flatten()],axis=1)
+                           for d in range(3) if cells[d] > 1])
+        angles = np.full(len(pairs),np.nan)
+        for p in range(len(q['meta'])):
+            m = np.all(phase[pairs] == p,axis=1)
+            if not np.any(m): continue
+            at = np.cumsum(phase==p)-1                                                               # position within phase
+            o = Result._orientation(q,phase,p)
+            angles[m] = o[at[pairs[m,0]]].disorientation(o[at[pairs[m,1]]]).as_axis_angle(pair=True)[1]
+        return pairs,angles
+
+    @staticmethod
+    def _grains(q,cells,phase,threshold):
+        """Grain IDs from connected regions of neighbors with disorientation angle below threshold."""
+        pairs,angles = Result._neighbor_disorientation(q,cells,phase)
+        c = angles < threshold
+        N = len(phase)
+        return csgraph.connected_components(sparse.coo_matrix((np.ones(np.count_nonzero(c)),pairs[c].T),
+                                                              shape=(N,N)),directed=False)[1]
+
+    @staticmethod
+    def _grain_reference_orientation_deviation(q,cells,phase,threshold):
+        """Disorientation angles to the average orientation of the grains and grain IDs."""
+        grain = Result._grains(q,cells,phase,threshold)
+        GROD = np.full(len(phase),np.nan)
+        for p in range(len(q['meta'])):
+            if not np.any(phase==p): continue
+            o = Result._orientation(q,phase,p)
+            inverse = np.unique(grain[phase==p],return_inverse=True)[1]
+            GROD[phase==p] = o.disorientation(o.average_by(grain[phase==p])[inverse]).as_axis_angle(pair=True)[1]
+        return GROD,grain
+
+    @staticmethod
+    def _add_kernel_average_misorientation(q,cells,phase,threshold):
+        pairs,angles = Result._neighbor_disorientation(q,cells,phase)
+        c = angles < threshold
+        N = len(phase)
+        s = np.bincount(pairs[c].flatten(),np.repeat(angles[c],2),N)
+        n = np.bincount(pairs[c].flatten(),minlength=N)
+        return {
+                'data':  np.divide(s,n,out=np.zeros(N),where=n>0),                                 # no neighbor below threshold: KAM = 0
+                'label': f"KAM({q['label']})",
+                'meta':  {
+                          'Unit':        'rad',
+                          'Description': f"Kernel average misorientation of {q['label']} "
+                                         f"(nearest neighbors below {np.degrees(threshold):g} deg)",
+                          'Creator':     'add_kernel_average_misorientation'
+                          }
+                 }
+    def add_kernel_average_misorientation(self,threshold,q='O',degrees=False):
+        """
+        Add kernel average misorientation (KAM).
+
+        The KAM of a point is the average disorientation angle to its
+        periodic nearest neighbors of the same phase.
+        Neighbors with a disorientation angle above the threshold
+        are considered to be separated by a grain boundary and are ignored.
+        Points without any considered neighbor, e.g. isolated single-point
+        grains, have a KAM of zero.
+
+        Parameters
+        ----------
+        threshold : float
+            Maximum disorientation angle of considered neighbors.
+        q : str, optional
+            Label of the dataset containing the crystallographic orientation as quaternions.
+            Defaults to 'O'.
+        degrees : bool, optional
+            Threshold is given in degrees. Defaults to False.
+
+        """
+        self._add_generic_grid(self._add_kernel_average_misorientation,{'q':q},
+                               {'threshold':np.radians(threshold) if degrees else threshold})
+
+
+    @staticmethod
+    def _add_grain_reference_orientation_deviation(q,cells,phase,threshold):
+        return {
+                'data':  Result._grain_reference_orientation_deviation(q,cells,phase,threshold)[0],
+                'label': f"GROD({q['label']})",
+                'meta':  {
+                          'Unit':        'rad',
+                          'Description': f"Grain reference orientation deviation of {q['label']} "
+                                         f"(grain boundaries above {np.degrees(threshold):g} deg)",
+                          'Creator':     'add_grain_reference_orientation_deviation'
+                          }
+                 }
+    def add_grain_reference_orientation_deviation(self,threshold,q='O',degrees=False):
+        """
+        Add grain reference orientation deviation (GROD).
+
+        The GROD of a point is its disorientation angle to the average
+        orientation of its grain.
+        Grains are the connected regions of the same phase in which
+        periodic nearest neighbors have a disorientation angle below the threshold.
+
+        Parameters
+        ----------
+        threshold : float
+            Disorientation angle above which neighbors belong to different grains.
+        q : str, optional
+            Label of the dataset containing the crystallographic orientation as quaternions.
+            Defaults to 'O'.
+        degrees : bool, optional
+            Threshold is given in degrees. Defaults to False.
+
+        """
+        self._add_generic_grid(self._add_grain_reference_orientation_deviation,{'q':q},
+                               {'threshold':np.radians(threshold) if degrees else threshold})
+
+
+    @staticmethod
+    def _add_grain_orientation_spread(q,cells,phase,threshold):
+        GROD,grain = Result._grain_reference_orientation_deviation(q,cells,phase,threshold)
+        return {
+                'data':  (np.bincount(grain,GROD)/np.bincount(grain))[grain],
+                'label': f"GOS({q['label']})",
+                'meta':  {
+                          'Unit':        'rad',
+                          'Description': f"Grain orientation spread of {q['label']} "
+                                         f"(grain boundaries above {np.degrees(threshold):g} deg)",
+                          'Creator':     'add_grain_orientation_spread'
+                          }
+                 }
+    def add_grain_orientation_spread(self,threshold,q='O',degrees=False):
+        """
+        Add grain orientation spread (GOS).
+
+        The GOS of a grain is the average grain reference orientation
+        deviation (GROD) of its points and is assigned to all of them.
+
+        Parameters
+        ----------
+        threshold : float
+            Disorientation angle above which neighbors belong to different grains.
+        q : str, optional
+            Label of the dataset containing the crystallographic orientation as quaternions.
+            Defaults to 'O'.
+        degrees : bool, optional
+            Threshold is given in degrees. Defaults to False.
+
+        """
+        self._add_generic_grid(self._add_grain_orientation_spread,{'q':q},
+                               {'threshold':np.radians(threshold) if degrees else threshold})
+
+
+    @staticmethod
+    def _add_feature_distance(q,cells,phase,size,threshold,feature,neighborhood):
+        material = Result._grains(q,cells,phase,threshold).reshape(cells,order='F')
+        return {
+                'data':  Grid(material,size).get_feature_distance(feature,neighborhood).reshape(-1,order='F'),
+                'label': f"d_{feature.replace(' ','_')}({q['label']})",
+                'meta':  {
+                          'Unit':        'm',
+                          'Description': f"Distance to closest {feature} of grains in {q['label']} "
+                                         f"(grain boundaries above {np.degrees(threshold):g} deg)",
+                          'Creator':     'add_feature_distance'
+                          }
+                 }
+    def add_feature_distance(self,threshold,feature='boundary',q='O',neighborhood='neumann',degrees=False):
+        """
+        Add Euclidean distance to grain boundaries, triple lines, or quadruple points.
+
+        Grains are the connected regions of the same phase in which
+        periodic nearest neighbors have a disorientation angle below the threshold.
+
+        Parameters
+        ----------
+        threshold : float
+            Disorientation angle above which neighbors belong to different grains.
+        feature : {'boundary', 'triple line', 'quadruple point'}, optional
+            Structural feature. Defaults to 'boundary'.
+        q : str, optional
+            Label of the dataset containing the crystallographic orientation as quaternions.
+            Defaults to 'O'.
+        neighborhood : {'neumann', 'moore'}, optional
+            Neighborhood used to detect the features. Defaults to 'neumann'.
+        degrees : bool, optional
+            Threshold is given in degrees. Defaults to False.
+
+        """
+        if feature not in ['boundary','triple line','quadruple point']:
+            raise ValueError(f'invalid feature "{feature}"')
+        if neighborhood not in ['neumann','moore']:
+            raise ValueError(f'invalid neighborhood "{neighborhood}"')
+        self._add_generic_grid(self._add_feature_distance,{'q':q},
+                               {'size':self.size,'threshold':np.radians(threshold) if degrees else threshold,
+                                'feature':feature,'neighborhood':neighborhood})
+
+
     @staticmethod
     def _add_maximum_shear(T_sym):
         return {
@@ -999,7 +1246,8 @@ class Result:
                 'meta':  {
                           'Unit':        F['meta']['Unit'],
                           'Description': f"Rotational part of {F['label']} ({F['meta']['Description']})",
-                          'Creator':     'add_rotation'
+                          'Creator':     'add_rotation',
+                          'Precision':   'double'
                           }
                  }
     def add_rotation(self,F):
@@ -1079,7 +1327,8 @@ class Result:
                           'Unit':        F['meta']['Unit'],
                           'Description': '{} stretch tensor of {} ({})'.format('Left' if t.upper() == 'V' else 'Right',
                                                                                F['label'],F['meta']['Description']),
-                          'Creator':     'add_stretch_tensor'
+                          'Creator':     'add_stretch_tensor',
+                          'Precision':   'double'
                           }
                  }
     def add_stretch_tensor(self,F='F',t='V'):
@@ -1133,7 +1382,6 @@ class Result:
             Arguments parsed to func.
 
         """
-        chunk_size = 1024**2//8
         pool = mp.Pool(int(os.environ.get('OMP_NUM_THREADS',1)))
         lock = mp.Manager().Lock()
 
@@ -1149,42 +1397,115 @@ class Result:
                 continue
             lock.acquire()
             with h5py.File(self.fname, 'a') as f:
-                try:
-                    if self._allow_modification and result[0]+'/'+result[1]['label'] in f:
-                        dataset = f[result[0]+'/'+result[1]['label']]
-                        dataset[...] = result[1]['data']
-                        dataset.attrs['Overwritten'] = 'Yes' if h5py3 else \
-                                                       'Yes'.encode()
-                    else:
-                        if result[1]['data'].size >= chunk_size*2:
-                            shape  = result[1]['data'].shape
-                            chunks = (chunk_size//np.prod(shape[1:]),)+shape[1:]
-                            dataset = f[result[0]].create_dataset(result[1]['label'],data=result[1]['data'],
-                                                                  maxshape=shape, chunks=chunks,
-                                                                  compression='gzip', compression_opts=6,
-                                                                  shuffle=True,fletcher32=True)
-                        else:
-                            dataset = f[result[0]].create_dataset(result[1]['label'],data=result[1]['data'])
-
-                    now = datetime.datetime.now().astimezone()
-                    dataset.attrs['Created'] = now.strftime('%Y-%m-%d %H:%M:%S%z') if h5py3 else \
-                                               now.strftime('%Y-%m-%d %H:%M:%S%z').encode()
-
-                    for l,v in result[1]['meta'].items():
-                        dataset.attrs[l]=v if h5py3 else v.encode()
-                    creator = dataset.attrs['Creator'] if h5py3 else \
-                              dataset.attrs['Creator'].decode()
-                    dataset.attrs['Creator'] = f"damask.Result.{creator} v{damask.version}" if h5py3 else \
-                                               f"damask.Result.{creator} v{damask.version}".encode()
-
-                except (OSError,RuntimeError) as err:
-                    print(f'Could not add dataset: {err}.')
+                self._write(f,*result)
             lock.release()
 
         pool.close()
         pool.join()
 
 
+    def _write(self,f,group,result):
+        """Write result of an add_* function to group in open DADF5 file."""
+        chunk_size = 1024**2//8
+        meta = {k:v for k,v in result['meta'].items() if k != 'Precision'}
+        precision = {'single':np.float32,'double':np.float64}.get(result['meta'].get('Precision'),self._precision)
+
+        try:
+            if self._allow_modification and group+'/'+result['label'] in f:
+                dataset = f[group+'/'+result['label']]
+                dataset[...] = result['data']                                                       # keeps existing precision
+                dataset.attrs['Overwritten'] = 'Yes' if h5py3 else \
+                                               'Yes'.encode()
+            else:
+                if result['data'].dtype in np.sctypes['float'] \
+                   and result['data'].dtype.itemsize > np.dtype(precision).itemsize:
+                    result['data'] = result['data'].astype(precision)
+                if result['data'].size >= chunk_size*2:
+                    shape  = result['data'].shape
+                    chunks = (chunk_size//np.prod(shape[1:]),)+shape[1:]
+                    dataset = f[group].create_dataset(result['label'],data=result['data'],
+                                                      maxshape=shape, chunks=chunks,
+                                                      compression='gzip', compression_opts=6,
+                                                      shuffle=True,fletcher32=True)
+                else:
+                    dataset = f[group].create_dataset(result['label'],data=result['data'])
+
+            now = datetime.datetime.now().astimezone()
+            dataset.attrs['Created'] = now.strftime('%Y-%m-%d %H:%M:%S%z') if h5py3 else \
+                                       now.strftime('%Y-%m-%d %H:%M:%S%z').encode()
+
+            for l,v in meta.items():
+                dataset.attrs[l]=v if h5py3 else v.encode()
+            creator = dataset.attrs['Creator'] if h5py3 else \
+                      dataset.attrs['Creator'].decode()
+            dataset.attrs['Creator'] = f"damask.Result.{creator} v{damask.version}" if h5py3 else \
+                                       f"damask.Result.{creator} v{damask.version}".encode()
+
+        except (OSError,RuntimeError) as err:
+            print(f'Could not add dataset: {err}.')
+
+
+    def _add_generic_grid(self,func,datasets,args={}):
+        """
+        General function to add data that depends on neighboring points of the grid.
+
+        The datasets of the visible phases are placed onto the grid and
+        the result is distributed back to the phases.
+
+        Parameters
+        ----------
+        func : function
+            Callback function that calculates a new dataset from one or
+            more datasets on the grid. The data of all points is given in
+            Fortran order, the metadata as list with one entry per phase.
+            func additionally receives the number of cells ('cells') and
+            the phase index of each point ('phase', -1 for points without data).
+        datasets : dictionary
+            Details of the datasets to be used: label (in HDF5 file) and
+            arg (argument to which the data is parsed in func).
+        args : dictionary, optional
+            Arguments parsed to func.
+
+        """
+        if self.N_constituents != 1 or not self.structured:
+            raise TypeError('grid-based calculation requires single constituent on structured grid')
+
+        groups = [g for g in self.groups_with_datasets(datasets.values()) if g.split('/')[1] == 'phase']
+        if len(groups) == 0:
+            print('No matching dataset found, no data was added.')
+            return
+
+        with h5py.File(self.fname,'r') as f:
+            mapping = f['mapping/phase'][:,0]
+
+        increments = list(dict.fromkeys([g.split('/')[0] for g in groups]))
+        for inc in util.show_progress(increments):
+            groups_inc = [g for g in groups if g.split('/')[0] == inc]
+            at_cell = [np.where(mapping['Name'] == str.encode(g.split('/')[2]))[0] for g in groups_inc]
+            phase = np.full(self.N_materialpoints,-1)
+            datasets_in = {arg:{'data':None,'label':label,'meta':[]} for arg,label in datasets.items()}
+            with h5py.File(self.fname,'r') as f:
+                for p,(group,at) in enumerate(zip(groups_inc,at_cell)):
+                    phase[at] = p
+                    for arg,label in datasets.items():
+                        loc  = f[group+'/'+label]
+                        data = loc[()]
+                        if data.dtype.names is not None:
+                            data = rfn.structured_to_unstructured(data)
+                        if datasets_in[arg]['data'] is None:
+                            datasets_in[arg]['data'] = np.full((self.N_materialpoints,)+data.shape[1:],np.nan)
+                        datasets_in[arg]['data'][at] = data[mapping['Position'][at]]
+                        datasets_in[arg]['meta'].append({k:(v if h5py3 else v.decode()) for k,v in loc.attrs.items()})
+
+            r = func(**datasets_in,cells=self.cells,phase=phase,**args)
+
+            with h5py.File(self.fname,'a') as f:
+                for group,at in zip(groups_inc,at_cell):
+                    data = np.empty((len(at),)+r['data'].shape[1:],r['data'].dtype)
+                    data[mapping['Position'][at]] = r['data'][at]
+                    self._write(f,group,{'data':data,'label':r['label'],'meta':r['meta'].copy()})
+
+
     def save_XDMF(self):
         """
         Write XDMF file to directly visualize data in DADF5 file.
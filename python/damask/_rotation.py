@@ -373,6 +373,47 @@ class Rotation:
                                         accept_homomorph = True)
 
 
+    def average_by(self,labels,weights=None):
+        """
+        Average rotations with the same label.
+
+        The weighted sums of the quaternion outer products are accumulated
+        per label, followed by a single batched eigendecomposition.
+
+        Parameters
+        ----------
+        labels : numpy.ndarray of shape (self.shape)
+            Label of each rotation.
+        weights : numpy.ndarray of shape (self.shape), optional
+            Relative weight of each rotation.
+
+        Returns
+        -------
+        average : Rotation of shape (N_labels)
+            Weighted average of the rotations of each label,
+            ordered according to the sorted unique labels.
+
+        References
+        ----------
+        Quaternion averaging
+        F. Landis Markley, Yang Cheng, John L. Crassidis, Yaakov Oshman
+        Journal of Guidance, Control, and Dynamics 30(4):1193-1197, 2007
+        10.2514/1.28949
+
+        """
+        unique,inverse = np.unique(np.asarray(labels).reshape(-1),return_inverse=True)
+        q = self.quaternion.reshape(-1,4)
+        w = np.ones(len(q)) if weights is None else np.asarray(weights,dtype=float).reshape(-1)
+
+        M = np.empty((len(unique),4,4))
+        for i in range(4):
+            for j in range(i,4):
+                M[:,i,j] = M[:,j,i] = np.bincount(inverse,w*q[:,i]*q[:,j],len(unique))
+        M /= np.bincount(inverse,w,len(unique)).reshape(-1,1,1)
+
+        return Rotation.from_quaternion(np.linalg.eigh(M)[1][...,-1],accept_homomorph = True)           # largest eigenvalue
+
+
     def misorientation(self,other):
         """
         Calculate misorientation from self to other Rotation.
@@ -4,10 +4,6 @@ from pathlib import Path
 
 import pandas as pd
 import numpy as np
-import vtk
-from vtk.util.numpy_support import numpy_to_vtk            as np_to_vtk
-from vtk.util.numpy_support import numpy_to_vtkIdTypeArray as np_to_vtkIdTypeArray
-from vtk.util.numpy_support import vtk_to_numpy            as vtk_to_np
 
 from . import util
 from . import Table
@@ -52,6 +48,9 @@ class VTK:
             Spatial origin coordinates.
 
         """
+        import vtk
+        from vtk.util.numpy_support import numpy_to_vtk            as np_to_vtk
+
         vtk_data = vtk.vtkRectilinearGrid()
         vtk_data.SetDimensions(*(np.array(grid)+1))
         coord = [np_to_vtk(np.linspace(origin[i],origin[i]+size[i],grid[i]+1),deep=True) for i in [0,1,2]]
@@ -81,6 +80,10 @@ class VTK:
             Name of the vtk.vtkCell subclass. Tested for TRIANGLE, QUAD, TETRA, and HEXAHEDRON.
 
         """
+        import vtk
+        from vtk.util.numpy_support import numpy_to_vtkIdTypeArray as np_to_vtkIdTypeArray
+        from vtk.util.numpy_support import numpy_to_vtk            as np_to_vtk
+
         vtk_nodes = vtk.vtkPoints()
         vtk_nodes.SetData(np_to_vtk(nodes))
         cells = vtk.vtkCellArray()
@@ -111,6 +114,10 @@ class VTK:
             Spatial position of the points.
 
         """
+        import vtk
+        from vtk.util.numpy_support import numpy_to_vtkIdTypeArray as np_to_vtkIdTypeArray
+        from vtk.util.numpy_support import numpy_to_vtk            as np_to_vtk
+
         N = points.shape[0]
         vtk_points = vtk.vtkPoints()
         vtk_points.SetData(np_to_vtk(points))
@@ -141,6 +148,8 @@ class VTK:
             vtkUnstructuredGrid, and vtkPolyData.
 
         """
+        import vtk
+
         if not os.path.isfile(fname):                                                               # vtk has a strange error handling
             raise FileNotFoundError(f'no such file: {fname}')
         ext = Path(fname).suffix
@@ -195,6 +204,8 @@ class VTK:
             Compress with zlib algorithm. Defaults to True.
 
         """
+        import vtk
+
         if   isinstance(self.vtk_data,vtk.vtkRectilinearGrid):
             writer = vtk.vtkXMLRectilinearGridWriter()
         elif isinstance(self.vtk_data,vtk.vtkUnstructuredGrid):
@@ -238,6 +249,8 @@ class VTK:
             Data label.
 
         """
+        from vtk.util.numpy_support import numpy_to_vtk            as np_to_vtk
+
         N_points = self.vtk_data.GetNumberOfPoints()
         N_cells  = self.vtk_data.GetNumberOfCells()
 
@@ -278,6 +291,8 @@ class VTK:
             Data label.
 
         """
+        from vtk.util.numpy_support import vtk_to_numpy            as vtk_to_np
+
         cell_data = self.vtk_data.GetCellData()
         for a in range(cell_data.GetNumberOfArrays()):
             if cell_data.GetArrayName(a) == label:
@@ -311,6 +326,8 @@ class VTK:
             Comments.
 
         """
+        import vtk
+
         s = vtk.vtkStringArray()
         s.SetName('comments')
         for c in [comments] if isinstance(comments,str) else comments:
@@ -333,6 +350,8 @@ class VTK:
 
     def __repr__(self):
         """ASCII representation of the VTK data."""
+        import vtk
+
         writer = vtk.vtkDataSetWriter()
         writer.SetHeader(f'# {util.execution_stamp("VTK")}')
         writer.WriteToOutputStringOn()
@@ -347,6 +366,8 @@ class VTK:
 
         See http://compilatrix.com/article/vtk-1 for further ideas.
         """
+        import vtk
+
         def screen_size():
             try:
                 import wx
@@ -221,7 +221,20 @@ def cellsSizeOrigin_coordinates0_point(coordinates0,ordered=True):
         Defaults to True.
 
     """
-    coords    = [_np.unique(coordinates0[:,i]) for i in range(3)]
+    coords = None
+    if ordered:                                                                                     # lines from cell count along x and y
+        N       = len(coordinates0)
+        changed = (coordinates0[:,1] != coordinates0[0,1]) | (coordinates0[:,2] != coordinates0[0,2])
+        cells_x = int(_np.argmax(changed)) if changed.any() else N
+        changed = coordinates0[::cells_x,2] != coordinates0[0,2]
+        cells_y = int(_np.argmax(changed)) if changed.any() else N//cells_x
+        coords  = [coordinates0[:cells_x,0],
+                   coordinates0[:cells_x*cells_y:cells_x,1],
+                   coordinates0[::cells_x*cells_y,2]]
+        if not (all(_np.all(_np.diff(c) > 0) for c in coords) and cells_x*cells_y*len(coords[2]) == N):
+            coords = None                                                                           # unordered, reported below
+    if coords is None:
+        coords = [_np.unique(coordinates0[:,i]) for i in range(3)]
     mincorner = _np.array(list(map(min,coords)))
     maxcorner = _np.array(list(map(max,coords)))
     cells     = _np.array(list(map(len,coords)),'i')
@@ -245,9 +258,12 @@ def cellsSizeOrigin_coordinates0_point(coordinates0,ordered=True):
             _np.allclose(coords[2],_np.linspace(start[2],end[2],cells[2]),atol=atol)):
         raise ValueError('Regular cell spacing violated.')
 
-    if ordered and not _np.allclose(coordinates0.reshape(tuple(cells)+(3,),order='F'),
-                                    coordinates0_point(cells,size,origin),atol=atol):
-        raise ValueError('Input data is not ordered (x fast, z slow).')
+    if ordered:
+        coordinates0_ = coordinates0.reshape(tuple(cells)+(3,),order='F')
+        for i in range(3):                                                                          # compare per direction, avoids full reference grid
+            shape = [-1 if i==j else 1 for j in range(3)]
+            if not _np.allclose(coordinates0_[...,i],_np.linspace(start[i],end[i],cells[i]).reshape(shape),atol=atol):
+                raise ValueError('Input data is not ordered (x fast, z slow).')
 
     return (cells,size,origin)
 
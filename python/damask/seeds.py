@@ -103,13 +103,7 @@ def from_grid(grid,selection=None,invert=False,average=False,periodic=True):
     if not average:
         return (coords[mask],material[mask])
     else:
-        materials = _np.unique(material[mask])
-        coords_ = _np.zeros((materials.size,3),dtype=float)
-        for i,mat in enumerate(materials):
-            pc = (2*_np.pi*coords[material[:,0]==mat,:]-grid.origin)/grid.size
-            coords_[i] = grid.origin + grid.size / 2 / _np.pi * (_np.pi +
-                         _np.arctan2(-_np.average(_np.sin(pc),axis=0),
-                                     -_np.average(_np.cos(pc),axis=0))) \
-                         if periodic else \
-                         _np.average(coords[material[:,0]==mat,:],axis=0)
-        return (coords_,materials)
+        statistics = grid.grain_statistics(periodic)
+        materials = statistics.get('material').flatten()
+        selected = _np.isin(materials,_np.unique(material[mask]))
+        return (statistics.get('centroid')[selected]-grid.origin,materials[selected])
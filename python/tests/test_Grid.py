@@ -1,14 +1,23 @@
+import sys
+import subprocess
+from pathlib import Path
+
 import pytest
 import numpy as np
+import h5py
+from scipy import ndimage, sparse
+from scipy.sparse import csgraph
 from vtk.util.numpy_support import numpy_to_vtk as np_to_vtk
 
 from damask import VTK
 from damask import Grid
 from damask import Table
 from damask import Rotation
+from damask import Orientation
 from damask import util
 from damask import seeds
 from damask import grid_filters
+from damask import _grid
 
 
 def grid_equal(a,b):
@@ -58,6 +67,76 @@ class TestGrid:
         new = Grid.load(tmp_path/'default.vtr')
         assert grid_equal(new,default)
 
+    @pytest.mark.parametrize('compress',[True,False])
+    def test_read_write_vtr_VTK(self,default,tmp_path,compress):
+        v = VTK.from_rectilinear_grid(default.cells,default.size,default.origin)
+        v.add(default.material.flatten(order='F'),'material')
+        v.add_comments(['first','second'])
+        v.save(tmp_path/'VTK.vtr',parallel=False,compress=compress)
+        loaded = Grid.load(tmp_path/'VTK.vtr')
+        assert grid_equal(loaded,default) and loaded.comments == ['first','second']
+        default.save(tmp_path/'native.vtr',compress=compress)
+        assert np.all(VTK.load(tmp_path/'native.vtr').get('material') == default.material.flatten(order='F'))
+
+    def test_vtr_without_VTK(self,default,tmp_path):
+        default.save(tmp_path/'default')
+        script = '\n'.join(['import sys',
+                            'class Block:',
+                            '    def find_spec(self,name,path,target=None):',
+                            "        if name.split('.')[0] in ['vtk','vtkmodules']: raise ImportError",
+                            'sys.meta_path.insert(0,Block())',
+                            'import damask',
+                            f"grid = damask.Grid.load('{tmp_path/'default.vtr'}')",
+                            f"grid.save('{tmp_path/'saved.vtr'}')"])
+        subprocess.run([sys.executable,'-c',script],check=True,cwd=Path(__file__).parents[1])
+        assert grid_equal(Grid.load(tmp_path/'saved.vtr'),default)
+
+    def test_load_fallback(self,default,tmp_path,monkeypatch):
+        default.save(tmp_path/'default')
+        def unsupported(fname):
+            raise _grid._UnsupportedLayout
+        monkeypatch.setattr(Grid,'_read_vtr',unsupported)
+        assert grid_equal(Grid.load(tmp_path/'default.vtr'),default)
+
+    @pytest.mark.parametrize('point_data',[None,'CellData'])
+    def test_load_DREAM3D(self,default,tmp_path,point_data):
+        N = default.material.max()+1
+        axis_angle = np.array([[0,0,1,0],[1,0,0,90],[0,1,0,90],[0,0,1,90],[1,1,1,120],[0,0,1,180]])
+        quaternions = Rotation.from_axis_angle(axis_angle[np.arange(N)%len(axis_angle)],
+                                               degrees=True,normalize=True).as_quaternion()
+        phases = np.random.randint(1,3,N)
+        avg_quats = np.block([-quaternions[:,1:],quaternions[:,:1]])                                # as in DADF5toDREAM3D.py
+        avg_quats[0] = 0.                                                                           # dummy feature
+        with h5py.File(tmp_path/'default.dream3d','w') as f:
+            f['DataContainers/d/_SIMPL_GEOMETRY/DIMENSIONS'] = default.cells
+            f['DataContainers/d/_SIMPL_GEOMETRY/SPACING'] = default.size/default.cells
+            f['DataContainers/d/_SIMPL_GEOMETRY/ORIGIN'] = default.origin
+            f['DataContainers/d/CellData/FeatureIds'] = default.material.T.reshape(-1,1).astype(np.int32)
+            f['DataContainers/d/Grain Data/Phases'] = phases.reshape(-1,1)
+            f['DataContainers/d/Grain Data/AvgQuats'] = avg_quats.astype(np.float32)
+        loaded,constituents = Grid.load_DREAM3D(tmp_path/'default.dream3d','d',point_data,feature_data='Grain Data')
+        assert np.all(loaded.material == (default.material if point_data else
+                                          np.arange(default.cells.prod()).reshape(default.cells,order='F')))
+        assert np.allclose(loaded.size,default.size) and np.allclose(loaded.origin,default.origin)
+        assert np.all(constituents['phase'] == phases)
+        assert np.allclose(constituents['O'],quaternions,atol=1e-6)
+        assert np.allclose(constituents['O'][:4],[[1,0,0,0],
+                                                  [np.sqrt(.5),np.sqrt(.5),0,0],
+                                                  [np.sqrt(.5),0,np.sqrt(.5),0],
+                                                  [np.sqrt(.5),0,0,np.sqrt(.5)]][:N],atol=1e-6)
+
+    @pytest.mark.parametrize('layered',[True,False])
+    def test_load_DREAM3D_slabs(self,tmp_path,layered):
+        cells = np.array([1100,2000,3])                                                             # more than one hyperslab
+        material = np.arange(cells.prod(),dtype=np.int32).reshape(tuple(cells[::-1])+(1,) if layered else (-1,1))
+        with h5py.File(tmp_path/'slabs.dream3d','w') as f:
+            f['DataContainers/d/_SIMPL_GEOMETRY/DIMENSIONS'] = cells
+            f['DataContainers/d/_SIMPL_GEOMETRY/SPACING'] = np.ones(3)
+            f['DataContainers/d/_SIMPL_GEOMETRY/ORIGIN'] = np.zeros(3)
+            f['DataContainers/d/CellData/FeatureIds'] = material
+        loaded = Grid.load_DREAM3D(tmp_path/'slabs.dream3d','d','CellData')
+        assert np.all(loaded.material == np.arange(cells.prod()).reshape(cells,order='F'))
+
     def test_invalid_no_material(self,tmp_path):
         v = VTK.from_rectilinear_grid(np.random.randint(5,10,3)*2,np.random.random(3) + 1.0)
         v.save(tmp_path/'no_materialpoint.vtr',parallel=False)
@@ -110,6 +189,34 @@ class TestGrid:
             Grid(material)
 
 
+    def test_to_memmap(self,default,tmp_path):
+        memmap = default.to_memmap(tmp_path/'material.raw')
+        assert isinstance(memmap.material,np.memmap) and memmap.material.dtype == np.uint8
+        assert grid_equal(memmap,default)
+        loaded = np.memmap(tmp_path/'material.raw',dtype=np.uint8,mode='r',shape=tuple(default.cells))
+        assert np.all(loaded == default.material)
+
+    @pytest.mark.parametrize('operation',[lambda g: g.mirror(['x','z']),
+                                          lambda g: g.flip(['y']),
+                                          lambda g: g.scale(g.cells*2),
+                                          lambda g: g.canvas(g.cells+3,[-1,2,0],300),
+                                          lambda g: g.substitute([1,2],[1000,-1])])
+    def test_memmap_operations(self,default,operation):
+        memmap = operation(default.to_memmap())
+        assert isinstance(memmap.material,np.memmap)
+        assert grid_equal(memmap,operation(default))
+
+    @pytest.mark.parametrize('memmap',[True,False])
+    def test_lazy(self,default,memmap):
+        def pipeline(g):
+            return g.canvas(g.cells+[2,-1,3],[-1,2,1]).mirror('xz').flip('y').substitute([3,42],[30,7]) \
+                    .scale([13,9,11]).canvas([14,10,12],[1,0,0],fill=99).substitute([99,30],[98,31]).canvas()
+        grid = default.to_memmap() if memmap else default
+        lazy = pipeline(grid.lazy()).compute()
+        assert isinstance(lazy.material,np.memmap) == memmap
+        assert grid_equal(lazy,pipeline(default))
+
+
     @pytest.mark.parametrize('directions,reflect',[
                                                    (['x'],        False),
                                                    (['x','y','z'],True),
@@ -176,6 +283,69 @@ class TestGrid:
                          )
 
 
+    @pytest.mark.parametrize('stencil',[2,3,4])
+    @pytest.mark.parametrize('selection',[None,[1,2]])
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_clean_generic_filter(self,stencil,selection,periodic):
+        material = np.random.randint(1,5,np.random.randint(3,10,3))
+        grid = Grid(material,np.ones(3))
+        def most_frequent(arr):
+            me = arr[arr.size//2]
+            if selection is None or me in selection:
+                unique, inverse = np.unique(arr, return_inverse=True)
+                return unique[np.argmax(np.bincount(inverse))]
+            else:
+                return me
+        reference = ndimage.generic_filter(material,most_frequent,
+                                           size=(stencil if selection is None else stencil//2*2+1,)*3,
+                                           mode=('wrap' if periodic else 'nearest'))
+        assert np.all(grid.clean(stencil,selection,periodic).material == reference)
+
+
+    def test_clean_iterations(self,default):
+        assert grid_equal(default.clean(iterations=2),default.clean().clean())
+
+
+    @pytest.mark.parametrize('immutable',[[],[1]])
+    @pytest.mark.parametrize('d',[1.,1.5])
+    def test_grain_growth(self,immutable,d):
+        """Compare to implementation of processing/pre/geom_grainGrowth.py (for even number of cells)."""
+        cells = np.random.randint(8,12,3)*2
+        material = Grid.from_Voronoi_tessellation(cells,np.ones(3),np.random.rand(4,3)).material
+        material_original = material.copy()
+        X,Y,Z = np.mgrid[0:cells[0],0:cells[1],0:cells[2]]
+        gauss = np.exp(-(X*X + Y*Y + Z*Z)/(2.0*d*d),dtype=np.float32)/np.power(2.0*np.pi*d*d,1.5,dtype=np.float32)
+        gauss[:,:,:cells[2]//2:-1] = gauss[:,:,1:(cells[2]+1)//2]
+        gauss[:,:cells[1]//2:-1,:] = gauss[:,1:(cells[1]+1)//2,:]
+        gauss[:cells[0]//2:-1,:,:] = gauss[1:(cells[0]+1)//2,:,:]
+        gauss = np.fft.rfftn(gauss).astype(np.complex64)
+        crop = tuple(slice(c//2,-c//2) for c in cells)
+        for i in range(2):
+            interface = np.zeros(material.shape,dtype=np.float32)
+            for shift in np.array(np.meshgrid(*[[-1,0,1]]*3)).reshape(3,-1).T:
+                interface = np.maximum(interface,np.float32(material != np.roll(material,shift,(0,1,2))))
+            diffused = np.fft.irfftn(np.fft.rfftn(np.where(ndimage.binary_dilation(interface > 0.,
+                                                                                  structure=ndimage.generate_binary_structure(3,1),
+                                                                                  iterations=int(round(d*2.))-1),
+                                                           1.,0.)).astype(np.complex64)*gauss).astype(np.float32)
+            periodic_diffused = np.tile(diffused,(3,3,3))[crop]
+            idx = ndimage.distance_transform_edt(periodic_diffused >= 0.95*np.amax(periodic_diffused),
+                                                 return_distances=False,return_indices=True)
+            material = np.tile(material,(3,3,3))[crop][idx[0],idx[1],idx[2]].reshape(2*cells)[crop]
+            idx = ndimage.distance_transform_edt(np.isin(material,immutable),return_distances=False,return_indices=True)
+            material = np.where(np.isin(material_original,immutable),material_original,material[idx[0],idx[1],idx[2]])
+
+        assert np.all(Grid(material_original,np.ones(3)).grain_growth(2,d,immutable).material == material)
+
+    @pytest.mark.parametrize('N,d,immutable',[(1,1.,[]),(2,1.5,[1]),(3,2.,[0,3])])
+    @pytest.mark.parametrize('tag',['32x24x20','36x28x1'])
+    def test_grain_growth_reference(self,ref_path,tag,N,d,immutable):
+        """Compare to results of processing/pre/geom_grainGrowth.py before switching to Grid.grain_growth."""
+        reference = ref_path/f'grain_growth_{tag}_{N}_{d}_{"+".join(map(str,immutable)) if immutable else None}.vtr'
+        grown = Grid.load(ref_path/f'grain_growth_{tag}.vtr').grain_growth(N,d,immutable)
+        assert np.all(grown.material == Grid.load(reference).material)
+
+
     @pytest.mark.parametrize('cells',[
                                      (10,11,10),
                                      [10,13,10],
@@ -224,6 +394,28 @@ class TestGrid:
         assert np.array_equiv(t,f) or (not grid_equal(modified,default))
         assert grid_equal(default, modified.substitute(t,f))
 
+    @pytest.mark.parametrize('inplace',[True,False])
+    @pytest.mark.parametrize('outlier',[[],[10**12]])
+    def test_substitute_dict(self,inplace,outlier):
+        material = np.random.randint(0,100,np.random.randint(5,10,3))
+        f = np.append(np.random.randint(0,120,80),outlier).astype(int)
+        t = np.random.randint(0,200,len(f))
+        mapper = dict(zip(f,t))
+        reference = np.vectorize(lambda m: mapper[m] if m in mapper else m)(material)
+        grid = Grid(material,np.ones(3))
+        assert np.all(grid.substitute(f,t,inplace).material == reference)
+        assert np.all(grid.material == reference) == inplace
+
+    def test_substitute_inplace_invalid(self,default):
+        with pytest.raises(ValueError):
+            default.substitute([1],[0.5],inplace=True)
+
+    @pytest.mark.parametrize('offset',[0,10**7])
+    def test_renumber_unique(self,offset):
+        material = np.random.randint(0,50,np.random.randint(5,10,3))**2 + offset
+        assert np.all(Grid(material,np.ones(3)).renumber().material
+                      == np.unique(material,return_inverse=True)[1].reshape(material.shape))
+
     def test_sort(self):
         cells = np.random.randint(5,20,3)
         m = Grid(np.random.randint(1,20,cells)*3,np.ones(3)).sort().material.flatten(order='F')
@@ -250,6 +442,15 @@ class TestGrid:
                           modified)
 
 
+    @pytest.mark.parametrize('axis_angle,k,axes',[([0,0,1,90],1,(0,1)),
+                                                  ([1,0,0,90],1,(1,2)),
+                                                  ([0,1,0,180],2,(0,2)),
+                                                  ([0,0,-1,90],3,(0,1))])
+    def test_rotate_90(self,default,axis_angle,k,axes):
+        modified = default.rotate(Rotation.from_axis_angle(axis_angle,degrees=True))
+        assert np.all(modified.material == np.rot90(default.material,k,axes))
+
+
     def test_canvas(self,default):
         cells = default.cells
         grid_add = np.random.randint(0,30,(3))
@@ -293,6 +494,29 @@ class TestGrid:
         assert grid_equal(G_1,G_2)
 
 
+    @pytest.mark.parametrize('integer',[True,False])
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_add_primitives(self,integer,periodic):
+        cells = np.random.randint(8,20,3)
+        size = np.random.random(3)+.5
+        origin = np.random.random(3)
+        N = np.random.randint(2,6)
+        if integer:
+            dimensions = np.random.randint(1,8,(N,3))
+            centers = np.random.randint(0,20,(N,3))
+        else:
+            dimensions = np.random.random((N,3))*size
+            centers = np.random.random((N,3))*size+origin
+        exponents = np.random.random((N,3))*2-.5
+        fills = np.random.randint(2,100,N)
+        R = Rotation.from_random(N)
+        G_1 = G_2 = Grid(np.ones(cells,'i'),size,origin)
+        for n in range(N):
+            G_1 = G_1.add_primitive(dimensions[n],centers[n],exponents[n],fills[n],R[n],periodic=periodic)
+        G_2 = G_2.add_primitives(dimensions,centers,exponents,fills,R,periodic)
+        assert grid_equal(G_1,G_2)
+
+
     @pytest.mark.parametrize('trigger',[[1],[]])
     def test_vicinity_offset(self,trigger):
         offset = np.random.randint(2,4)
@@ -314,6 +538,23 @@ class TestGrid:
         assert np.all(m2==grid.material)
 
 
+    @pytest.mark.parametrize('trigger',[[],[1],[2,4],[1,3,5,7]])
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_vicinity_offset_generic_filter(self,trigger,periodic):
+        vicinity = np.random.randint(1,3)
+        material = np.random.randint(1,6,np.random.randint(3,10,3))
+        material[:material.shape[0]//2] = 3
+        def tainted_neighborhood(stencil):
+            me = stencil[stencil.shape[0]//2]
+            return np.any(stencil != me
+                          if len(trigger) == 0 else
+                          np.in1d(stencil,np.array(list(set(trigger) - {me}))))
+        mask = ndimage.generic_filter(material,tainted_neighborhood,size=1+2*vicinity,
+                                      mode='wrap' if periodic else 'nearest')
+        grid = Grid(material,np.ones(3)).vicinity_offset(vicinity,10,trigger,periodic)
+        assert np.all(grid.material == np.where(mask,material+10,material))
+
+
     @pytest.mark.parametrize('periodic',[True,False])
     def test_vicinity_offset_invariant(self,default,periodic):
         offset = default.vicinity_offset(trigger=[default.material.max()+1,
@@ -321,6 +562,168 @@ class TestGrid:
         assert np.all(offset.material==default.material)
 
 
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_grain_statistics(self,default,periodic):
+        stats,neighbors = default.grain_statistics(periodic,return_neighbors=True)
+        coords = grid_filters.coordinates0_point(default.cells,default.size,default.origin)
+        for m,V,c,lo,hi,N in zip(stats.get('material'),stats.get('V'),stats.get('centroid'),
+                                 stats.get('bbox_min'),stats.get('bbox_max'),stats.get('N_neighbors')):
+            mask = default.material == m
+            assert np.isclose(V,np.count_nonzero(mask)*np.prod(default.size/default.cells))
+            idx = np.argwhere(mask)
+            assert np.all(lo == idx.min(axis=0)) and np.all(hi == idx.max(axis=0)+1)
+            assert N == np.count_nonzero(np.any(neighbors == m,axis=1))
+            if not periodic:
+                assert np.allclose(c,np.average(coords[mask],axis=0))
+
+    def test_grain_statistics_periodic_centroid(self):
+        material = np.zeros((10,6,8),dtype=int)
+        material[[0,1,9],1:3,2:4] = 1
+        stats = Grid(material,np.array([10.,6.,8.]),np.ones(3)).grain_statistics()
+        assert np.allclose(stats.get('centroid')[1],[1.5,3.,4.]) and stats.get('N_neighbors')[0] == 1
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    @pytest.mark.parametrize('connectivity',[6,18,26])
+    def test_split_disconnected(self,periodic,connectivity):
+        material = np.random.randint(0,4,np.random.randint(3,7,3))
+        split = Grid(material,np.ones(3)).split_disconnected(periodic,connectivity).material
+        idx = np.arange(material.size).reshape(material.shape)
+        edges = []
+        for d in np.array(np.meshgrid(*[[-1,0,1]]*3,indexing='ij')).reshape(3,-1).T:
+            if not 0 < np.sum(np.abs(d)) <= {6:1,18:2,26:3}[connectivity]: continue
+            b = np.roll(idx,-d,(0,1,2))
+            valid = np.ones(material.shape,dtype=bool)
+            if not periodic:
+                for i in range(3):
+                    if d[i] ==  1: valid[tuple(-1 if i==j else slice(None) for j in range(3))] = False
+                    if d[i] == -1: valid[tuple( 0 if i==j else slice(None) for j in range(3))] = False
+            valid &= material == material.flatten()[b]
+            edges.append(np.stack((idx[valid],b[valid]),axis=1))
+        edges = np.vstack(edges)
+        graph = sparse.coo_matrix((np.ones(len(edges)),(edges[:,0],edges[:,1])),shape=(material.size,)*2)
+        region = csgraph.connected_components(graph,directed=False)[1].reshape(material.shape)
+        assert len(np.unique(split)) == len(np.unique(region))
+        assert len(np.unique(np.stack((split,region),axis=-1).reshape(-1,2),axis=0)) == len(np.unique(region))
+        for m in np.unique(material):
+            assert split.flatten()[np.argmax(material.flatten()==m)] == m
+
+    def test_split_disconnected_invalid(self,default):
+        with pytest.raises(ValueError):
+            default.split_disconnected(connectivity=8)
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_distance_transform(self,periodic):
+        cells    = np.random.randint(5,10,3)
+        sampling = np.random.random(3) + 0.5
+        mask     = np.random.random(cells) > 0.05
+        mask[tuple(np.random.randint(0,5,3))] = False
+        distance,indices = Grid._distance_transform(mask,sampling,periodic,return_indices=True)
+        v = (np.indices(cells) - indices).astype(float)
+        target = np.argwhere(~mask)
+        d = np.indices(cells).reshape(3,-1).T[:,np.newaxis] - target
+        if periodic:
+            v -= np.round(v/cells.reshape(3,1,1,1))*cells.reshape(3,1,1,1)
+            d = d - np.round(d/cells)*cells
+        assert not mask[tuple(indices)].any() \
+           and np.allclose(np.linalg.norm(v*sampling.reshape(3,1,1,1),axis=0),distance) \
+           and np.allclose(np.min(np.linalg.norm(d*sampling,axis=-1),axis=-1).reshape(cells),distance)
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    @pytest.mark.parametrize('neighborhood',['neumann','moore'])
+    @pytest.mark.parametrize('feature,N',[('boundary',1),('triple line',2),('quadruple point',3)])
+    def test_feature_distance(self,periodic,neighborhood,feature,N):
+        cells = np.random.randint(4,9,3)
+        size = np.random.random(3)+.5
+        material = np.random.randint(0,4,cells)
+        material[:,:cells[1]//2] = 0
+        offsets = [o for o in np.ndindex(3,3,3) if sum(np.abs(np.array(o)-1)) == 1 or neighborhood == 'moore']
+        is_feature = np.zeros(cells,dtype=bool)
+        for p in np.ndindex(*cells):
+            neighbors = set()
+            for o in offsets:
+                q = np.array(p)+o-1
+                q = q%cells if periodic else np.clip(q,0,cells-1)
+                neighbors.add(material[tuple(q)])
+            is_feature[p] = len(neighbors-{material[p]}) >= N
+        x = grid_filters.coordinates0_point(cells,size).reshape(-1,1,3)
+        d = x - x[is_feature.flatten()].reshape(1,-1,3)
+        if periodic: d -= np.round(d/size)*size
+        distance = np.min(np.linalg.norm(d,axis=-1),axis=-1,initial=np.inf).reshape(cells)
+        assert np.allclose(Grid(material,size).get_feature_distance(feature,neighborhood,periodic),distance)
+
+    @pytest.mark.parametrize('feature,neighborhood',[('line','neumann'),('boundary','hexagonal')])
+    def test_feature_distance_invalid(self,default,feature,neighborhood):
+        with pytest.raises(ValueError):
+            default.get_feature_distance(feature,neighborhood)
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_pyramid(self,periodic):
+        cells = np.random.randint(1,12,3)
+        material = np.random.randint(0,4,cells)
+        coarse = material
+        for level in Grid(material,np.ones(3)).pyramid(2,periodic):
+            padded = np.pad(coarse,[(0,c%2 if c>1 else 0) for c in coarse.shape],mode='wrap' if periodic else 'edge')
+            reference = np.empty(level.cells,dtype=int)
+            for p in np.ndindex(*level.cells):
+                block = padded[tuple(slice(2*i,2*i+2) for i in p)].flatten()
+                reference[p] = np.argmax(np.bincount(block))
+            assert np.all(level.material == reference)
+            coarse = reference
+
+    def test_pyramid_cache(self,default):
+        first = default.pyramid(2)
+        assert grid_equal(default.pyramid(1)[0],first[0])
+        default.substitute(np.arange(1,42),np.arange(41,0,-1),inplace=True)
+        assert grid_equal(default.pyramid(2)[1],default.scale(default.cells).pyramid(2)[1])
+        assert not grid_equal(default.pyramid(2)[1],first[1])
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_grain_boundary_areas(self,periodic):
+        material = np.random.randint(0,6,np.random.randint(3,7,3))
+        size = np.random.random(3)+.5
+        areas = {}
+        for i in range(3):
+            a = material if periodic else np.take(material,range(material.shape[i]-1),i)
+            b = np.roll(material,-1,i) if periodic else np.take(material,range(1,material.shape[i]),i)
+            for x,y in zip(a.flatten(),b.flatten()):
+                if x != y: areas[(min(x,y),max(x,y))] = areas.get((min(x,y),max(x,y)),0.) \
+                                                      + np.prod(np.delete(size/material.shape,i))
+        boundaries,table = Grid(material,size).get_grain_boundaries(periodic,return_areas=True)
+        assert dict(zip(map(tuple,table.get('material')),table.get('A').flatten())) == pytest.approx(areas)
+        assert set(map(tuple,boundaries.get('material'))) == set(areas)
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_no_grain_boundaries(self,periodic):
+        boundaries,table = Grid(np.zeros((4,5,6),int),np.ones(3)).get_grain_boundaries(periodic,return_areas=True)
+        assert boundaries.vtk_data.GetNumberOfCells() == 0 and len(table.data) == 0 \
+           and table.shapes == {'material':(2,),'A':(1,)}
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_merge_by_disorientation(self,periodic):
+        N = np.random.randint(10,20)
+        material = np.random.randint(0,N,np.random.randint(3,7,3))
+        base = Rotation.from_random(4)[np.random.randint(0,4,N)]
+        O = Orientation(base*Rotation.from_axis_angle(np.column_stack((np.ones((N,3))/np.sqrt(3),
+                                                                       np.random.random(N)*4.)),degrees=True),
+                        'cubic')
+        group = np.arange(N)
+        for a,b in Grid(material,np.ones(3)).get_neighbors(periodic):
+            if O[a].disorientation(O[b]).as_axis_angle(degrees=True,pair=True)[1] < 5.:
+                group[group == group[b]] = group[a]
+        smallest = {g:np.min(np.flatnonzero(group==g)) for g in np.unique(group)}
+        merged = Grid(material,np.ones(3)).merge_by_disorientation(O,5.,True,periodic)
+        assert np.all(merged.material == np.vectorize(lambda m: smallest[group[m]])(material))
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_neighbors(self,periodic):
+        material = np.random.randint(0,6,np.random.randint(3,7,3))
+        pairs = set()
+        for i in range(3):
+            a = material if periodic else np.take(material,range(material.shape[i]-1),i)
+            b = np.roll(material,-1,i) if periodic else np.take(material,range(1,material.shape[i]),i)
+            pairs |= {(min(x,y),max(x,y)) for x,y in zip(a.flatten(),b.flatten()) if x != y}
+        assert set(map(tuple,Grid(material,np.ones(3)).get_neighbors(periodic))) == pairs
+
     @pytest.mark.parametrize('periodic',[True,False])
     def test_tessellation_approaches(self,periodic):
         cells  = np.random.randint(10,20,3)
@@ -344,6 +747,63 @@ class TestGrid:
         assert np.all(Laguerre.material == ms)
 
 
+    def test_Laguerre_weights_inf(self):
+        cells  = np.random.randint(10,20,3)
+        size   = np.random.random(3) + 1.0
+        N_seeds= np.random.randint(10,30)
+        seeds  = np.random.rand(N_seeds,3) * np.broadcast_to(size,(N_seeds,3))
+        weights= np.random.random(N_seeds)
+        ms     = np.random.randint(N_seeds)
+        weights[ms] = np.inf
+        Laguerre = Grid.from_Laguerre_tessellation(cells,size,seeds,weights,periodic=np.random.random()>0.5)
+        assert np.all(Laguerre.material == ms)
+
+
+    def test_Laguerre_seeds_outside(self):
+        cells  = np.random.randint(5,10,3)
+        size   = np.random.random(3) + 1.0
+        N_seeds= np.random.randint(5,15)
+        seeds  = np.random.rand(N_seeds,3) * np.broadcast_to(size,(N_seeds,3))
+        weights= np.random.random(N_seeds)*0.1
+        shifted= seeds + np.random.randint(-2,3,(N_seeds,3))*size
+        assert grid_equal(Grid.from_Laguerre_tessellation(cells,size,seeds,  weights),
+                          Grid.from_Laguerre_tessellation(cells,size,shifted,weights))
+
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_Laguerre_brute_force(self,periodic):
+        cells  = np.random.randint(5,10,3)
+        size   = np.random.random(3) + 1.0
+        N_seeds= np.random.randint(5,15)
+        seeds  = np.random.rand(N_seeds,3) * np.broadcast_to(size,(N_seeds,3))
+        weights= np.random.random(N_seeds)*0.1
+        coords = grid_filters.coordinates0_point(cells,size).reshape(-1,1,3)
+        d = coords - seeds
+        if periodic: d -= np.round(d/size)*size
+        material = np.argmin(np.sum(d**2,axis=-1)-weights,axis=-1).reshape(cells)
+        Laguerre = Grid.from_Laguerre_tessellation(cells,size,seeds,weights,periodic=periodic)
+        assert np.all(Laguerre.material == material)
+
+
+    @pytest.mark.parametrize('periodic',[True,False])
+    def test_Voronoi_distance(self,tmp_path,periodic):
+        cells  = np.random.randint(5,10,3)
+        size   = np.random.random(3) + 1.0
+        N_seeds= np.random.randint(5,15)
+        seeds  = np.random.rand(N_seeds,3) * np.broadcast_to(size,(N_seeds,3))
+        coords = grid_filters.coordinates0_point(cells,size).reshape(-1,1,3)
+        d = coords - seeds
+        if periodic: d -= np.round(d/size)*size
+        i = np.argsort(np.sum(d**2,axis=-1),axis=-1)[:,:2]
+        v = np.take_along_axis(d,i[...,np.newaxis],1)
+        distance = (np.sum(v[:,1]**2,axis=-1)-np.sum(v[:,0]**2,axis=-1)) \
+                 / (2.*np.linalg.norm(v[:,0]-v[:,1],axis=-1))
+        Voronoi,Voronoi_distance = Grid.from_Voronoi_tessellation(cells,size,seeds,periodic=periodic,
+                                                                  fname=tmp_path/'Voronoi.raw',return_distance=True)
+        assert isinstance(Voronoi.material,np.memmap) and np.all(Voronoi.material == i[:,0].reshape(cells)) \
+           and np.allclose(Voronoi_distance,distance.reshape(cells))
+
+
     @pytest.mark.parametrize('approach',['Laguerre','Voronoi'])
     def test_tessellate_bicrystal(self,approach):
         cells = np.random.randint(5,10,3)*2
@@ -426,6 +886,6 @@ class TestGrid:
         grid=Grid.load(ref_path/'get_grain_boundaries_8g12x15x20.vtr')
         current=grid.get_grain_boundaries(periodic,direction)
         if update:
-            current.save(ref_path/f'get_grain_boundaries_8g12x15x20_{direction}_{periodic}.vtu',parallel=False)
+            current.save(ref_path/f'get_grain_boundaries_8g12x15x20_{"".join(direction)}_{periodic}.vtu',parallel=False)
         reference=VTK.load(ref_path/f'get_grain_boundaries_8g12x15x20_{"".join(direction)}_{periodic}.vtu')
         assert current.__repr__() == reference.__repr__()
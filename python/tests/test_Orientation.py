@@ -167,6 +167,15 @@ class TestOrientation:
         avg_angle = o.average().as_axis_angle(degrees=True,pair=True)[1]
         assert np.isclose(avg_angle,10+(angle-10)/2.)
 
+    @pytest.mark.parametrize('lattice',Orientation.crystal_families)
+    def test_average_by(self,lattice):
+        o = Orientation.from_random(lattice=lattice,shape=50)
+        labels = np.random.randint(3,7,50)
+        weights = np.random.rand(50)
+        avg = o.average_by(labels,weights)
+        for i,l in enumerate(np.unique(labels)):
+            assert avg[i] == o[labels==l].average(weights[labels==l])
+
     @pytest.mark.parametrize('lattice',Orientation.crystal_families)
     def test_reduced_equivalent(self,lattice):
         i = Orientation(lattice=lattice)
@@ -208,6 +217,39 @@ class TestOrientation:
             assert o[tuple(loc[:len(o.shape)])].disorientation(p[tuple(loc[-len(p.shape):])]) \
                 == o.disorientation(p)[tuple(loc)]
 
+    @pytest.mark.parametrize('lattice',Orientation.crystal_families)
+    @pytest.mark.parametrize('shapes',[((),()),((5,3),(3,)),((4,),(2,4))])
+    def test_disorientation_all_combinations(self,lattice,shapes):
+        o = Orientation.from_random(lattice=lattice,shape=shapes[0])
+        p = Orientation.from_random(lattice=lattice,shape=shapes[1])
+        blend = util.shapeblender(o.shape,p.shape)
+        s_ = o.equivalent.reshape((-1,1)+o.shape).broadcast_to((len(o.symmetry_operations),)*2+blend,mode='right')
+        o_ = p.equivalent.reshape((1,-1)+p.shape).broadcast_to((len(o.symmetry_operations),)*2+blend,mode='right')
+        r_ = s_.misorientation(o_)                                                                  # all combinations at once
+        _r = ~r_
+        forward = r_.in_FZ & r_.in_disorientation_FZ
+        reverse = _r.in_FZ & _r.in_disorientation_FZ
+        ok  = forward | reverse
+        ok &= (np.cumsum(ok.reshape((-1,)+ok.shape[2:]),axis=0) == 1).reshape(ok.shape)
+        r = np.where(np.any(forward[...,np.newaxis],axis=(0,1),keepdims=True),r_.quaternion,_r.quaternion)
+        loc  = np.where(ok)
+        sort = 0 if len(loc) == 2 else np.lexsort(loc[:1:-1])
+        d,ops = o.disorientation(p,return_operators=True)
+        assert np.allclose(d.quaternion,r[ok][sort].reshape(blend+(4,))) \
+           and np.all(ops == (np.vstack(loc[:2]).T)[sort].reshape(blend+(2,)))
+
+    @pytest.mark.parametrize('lattice',Orientation.crystal_families)
+    def test_disorientation_chunked(self,lattice):
+        o = Orientation.from_random(lattice=lattice,shape=(5,3))
+        p = Orientation.from_random(lattice=lattice,shape=3)
+        d,ops = o.disorientation(p,return_operators=True)
+        d_chunked,ops_chunked = o.disorientation(p,return_operators=True,memory=1)
+        eq_o,eq_p,idx = o.equivalent,p.broadcast_to(o.shape).equivalent,tuple(np.indices(o.shape))
+        def angle(ops):                                                                             # operators may differ for ties
+            return eq_o[(ops[...,0],)+idx].misorientation(eq_p[(ops[...,1],)+idx]).as_axis_angle(pair=True)[1]
+        assert np.allclose(d_chunked.quaternion,d.quaternion) and np.allclose(angle(ops_chunked),angle(ops)) \
+           and np.allclose(angle(ops),d.as_axis_angle(pair=True)[1])
+
     @pytest.mark.parametrize('lattice',Orientation.crystal_families)
     def test_disorientation360(self,lattice):
         o_1 = Orientation(Rotation(),lattice)
@@ -329,6 +371,10 @@ class TestOrientation:
         with pytest.raises(ValueError):
             Orientation(lattice=None).disorientation(Orientation(lattice=None))                     # noqa
 
+    def test_missing_symmetry_average_by(self):
+        with pytest.raises(ValueError):
+            Orientation(lattice=None).broadcast_to(3).average_by([0,1,0])                         # noqa
+
     def test_missing_symmetry_average(self):
         with pytest.raises(ValueError):
             Orientation(lattice=None).average()                                                     # noqa
@@ -456,6 +502,17 @@ class TestOrientation:
                         alpha=alpha,beta=beta,gamma=gamma)
         assert np.allclose(np.eye(3),np.einsum('ik,jk',L.basis_real,L.basis_reciprocal))
 
+    @pytest.mark.parametrize('lattice',['aP','hP','cF'])
+    def test_cached_independent(self,lattice):
+        o = Orientation.from_random(lattice=lattice,a=1.,b=2.,c=3.,alpha=1.,beta=1.2,gamma=1.4) \
+            if lattice == 'aP' else Orientation.from_random(lattice=lattice)
+        basis_real,basis_reciprocal,sym = o.basis_real,o.basis_reciprocal,o.symmetry_operations
+        o.basis_real[0,0] += 1.
+        o.basis_reciprocal[0,0] += 1.
+        o.symmetry_operations.quaternion[0] *= -1.
+        assert np.all(o.basis_real == basis_real) and np.all(o.basis_reciprocal == basis_reciprocal) \
+           and np.all(o.symmetry_operations.quaternion == sym.quaternion)
+
     @pytest.mark.parametrize('keyFrame,keyLattice',[('uvw','direction'),('hkl','plane'),])
     @pytest.mark.parametrize('vector',np.array([
                                                 [1.,1.,1.],
@@ -9,6 +9,7 @@ import numpy as np
 import h5py
 
 from damask import Result
+from damask import Grid
 from damask import Rotation
 from damask import Orientation
 from damask import tensor
@@ -179,6 +180,55 @@ class TestResult:
         in_file = default.read_dataset(loc['color'])
         assert np.allclose(in_memory,in_file)
 
+    def test_add_kernel_average_misorientation(self,default):
+        threshold = np.random.rand()*10.+2.
+        default.add_kernel_average_misorientation(threshold,degrees=True)
+        loc = {'O':   default.get_dataset_location('O'),
+               'KAM': default.get_dataset_location('KAM(O)')}
+        cells = tuple(default.cells)
+        qu = default.read_dataset(loc['O']).view(np.double).reshape(cells[::-1]+(4,)).transpose(2,1,0,3)
+        with h5py.File(default.fname,'r') as f:
+            phase = f['mapping/phase'][:,0]['Name'].reshape(cells,order='F')
+        s = np.zeros(cells)
+        n = np.zeros(cells)
+        for path in loc['O']:
+            o = Orientation(rotation=qu,lattice=default._get_attribute(path,'Lattice'))
+            name = path.split('/')[2].encode()
+            for d in range(3):
+                for shift in [-1,1]:
+                    a = o.disorientation(o.copy(rotation=np.roll(qu,shift,d))).as_axis_angle(pair=True,degrees=True)[1]
+                    c = (phase == name) & (np.roll(phase,shift,d) == name) & (a < threshold)
+                    s += np.where(c,np.radians(a),0.)
+                    n += c
+        in_memory = np.where(n>0,s/np.maximum(n,1),0.).reshape(-1,1,order='F')
+        in_file   = default.read_dataset(loc['KAM'])
+        assert np.allclose(in_memory,in_file)
+
+    def test_add_kernel_average_misorientation_isolated(self,default):
+        default.add_kernel_average_misorientation(0.)
+        assert np.all(default.read_dataset(default.get_dataset_location('KAM(O)')) == 0.)
+
+    @pytest.mark.parametrize('feature',['boundary','triple line','quadruple point'])
+    def test_add_feature_distance(self,default,ref_path,feature):
+        default.add_feature_distance(10.,feature,degrees=True)
+        label = f"d_{feature.replace(' ','_')}(O)"
+        in_memory = Grid.load(ref_path/'12grains6x7x8.vtr').get_feature_distance(feature).reshape(-1,1,order='F')
+        in_file   = default.read_dataset(default.get_dataset_location(label))
+        assert np.allclose(in_memory,in_file)
+
+    def test_add_grain_orientation_spread(self,single_phase):
+        single_phase.view('increments',single_phase.increments[-1])
+        single_phase.add_grain_reference_orientation_deviation(np.pi)                              # single grain
+        single_phase.add_grain_orientation_spread(np.pi)
+        loc = {'O':    single_phase.get_dataset_location('O'),
+               'GROD': single_phase.get_dataset_location('GROD(O)'),
+               'GOS':  single_phase.get_dataset_location('GOS(O)')}
+        qu = single_phase.read_dataset(loc['O']).view(np.double).reshape(-1,4)
+        o = Orientation(rotation=qu,lattice=single_phase._get_attribute(loc['O'][0],'Lattice'))
+        GROD = o.disorientation(o.average()).as_axis_angle(pair=True)[1].reshape(-1,1)
+        assert np.allclose(GROD,single_phase.read_dataset(loc['GROD'])) and \
+               np.allclose(np.average(GROD),single_phase.read_dataset(loc['GOS']))
+
     def test_add_maximum_shear(self,default):
         default.add_stress_Cauchy('P','F')
         default.add_maximum_shear('sigma')
@@ -301,6 +351,40 @@ class TestResult:
         in_file   = default.read_dataset(loc['V(F)'],0)
         assert np.allclose(in_memory,in_file)
 
+    @pytest.mark.parametrize('precision,dtype',[('single',np.float32),('double',np.float64)])
+    def test_set_precision(self,default,precision,dtype):
+        default.set_precision(precision)
+        default.add_stress_Cauchy('P','F')
+        default.add_equivalent_Mises('sigma')
+        loc = {'sigma'   :default.get_dataset_location('sigma'),
+               'sigma_vM':default.get_dataset_location('sigma_vM')}
+        in_memory = mechanics.equivalent_stress_Mises(default.read_dataset(loc['sigma'],0)).reshape(-1,1)
+        in_file   = default.read_dataset(loc['sigma_vM'],0)
+        assert in_file.dtype == dtype and np.allclose(in_memory,in_file,rtol=1e-6)
+
+    def test_set_precision_exempt(self,default):
+        default.set_precision('single')
+        default.add_rotation('F')
+        assert default.read_dataset(default.get_dataset_location('R(F)'),0).dtype == np.float64
+
+    @pytest.mark.parametrize('precision,dtype',[(None,np.float32),('double',np.float64)])
+    def test_set_precision_calculation(self,default,precision,dtype):
+        default.set_precision('single')
+        default.add_calculation('x','2.0*#F#',precision=precision)
+        assert default.read_dataset(default.get_dataset_location('x'),0).dtype == dtype
+
+    def test_set_precision_overwrite(self,default):
+        default.add_calculation('x','2.0*#F#')
+        default.set_precision('single')
+        default.allow_modification()
+        default.add_calculation('x','3.0*#F#')
+        in_file = default.read_dataset(default.get_dataset_location('x'),0)
+        assert in_file.dtype == np.float64 and np.all(in_file == 3.0*default.read_dataset(default.get_dataset_location('F'),0))
+
+    def test_set_precision_invalid(self,default):
+        with pytest.raises(ValueError):
+            default.set_precision('half')
+
     def test_add_invalid(self,default):
         with pytest.raises(TypeError):
             default.add_calculation('#invalid#*2')
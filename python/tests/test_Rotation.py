@@ -1033,6 +1033,14 @@ class TestRotation:
         assert np.isclose(avg_angle,10+(angle-10)/2.)
 
 
+    def test_average_by(self):
+        R = Rotation.from_random(40)
+        labels = np.random.randint(0,4,40)
+        avg = R.average_by(labels)
+        for i,l in enumerate(np.unique(labels)):
+            assert avg[i] == R[labels==l].average()
+
+
     @pytest.mark.parametrize('sigma',[5,10,15,20])
     @pytest.mark.parametrize('N',[1000,10000,100000])
     def test_spherical_component(self,N,sigma):
@@ -129,6 +129,15 @@ class TestGridFilters:
         else:
             function(unordered,mode)
 
+    def test_shuffled_coordinates(self):
+        origin = np.random.random(3)
+        size   = np.random.random(3)*10.+origin
+        cells  = np.random.randint(8,32,(3))
+        shuffled = np.random.permutation(grid_filters.coordinates0_point(cells,size,origin).reshape(-1,3,order='F'))
+        with pytest.raises(ValueError,match='not ordered'):
+            grid_filters.cellsSizeOrigin_coordinates0_point(shuffled)
+        assert np.allclose(grid_filters.cellsSizeOrigin_coordinates0_point(shuffled,False)[0],cells)
+
     def test_regrid(self):
          size = np.random.random(3)
          cells = np.random.randint(8,32,(3))